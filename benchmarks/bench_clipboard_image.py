@@ -0,0 +1,129 @@
+import os
+import sys
+import time
+import resource
+import subprocess
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "masking"))
+
+from PyQt5.QtGui import QGuiApplication, QImage, QPixmap, QPainter, QColor
+from PyQt5.QtCore import QBuffer, QByteArray, QMimeData
+
+# monitor_clipboard 기존 방식 vs 해시 방식: 틱당 CPU 시간과 최대 메모리(RSS) 비교
+# 매 틱마다 실제 (offscreen) 클립보드에서 이미지를 다시 읽음
+# - legacy: 기존 pixmap 비교
+# - hash: 매번 전체 버퍼 해시
+# - fingerprint: ClipboardImageFingerprint
+# 클립보드 내용은 두 가지
+# - qt: setImage 로 넣은 QImage (같은 프로세스가 넣은 경우. offscreen 은 매번 같은 QImage 를 돌려줌)
+# - foreign: 다른 앱이 올린 PNG. image() 를 부를 때마다 새로 디코딩함 (macOS 폴링과 같은 경우)
+# 모드별 최대 메모리를 분리하기 위해 각 모드를 별도 프로세스로 실행
+WIDTH, HEIGHT = 3840, 2160
+TICKS = 20
+
+def make_image(seed):
+    img = QImage(WIDTH, HEIGHT, QImage.Format_ARGB32)
+    img.fill(QColor(255, 255, 255))
+    painter = QPainter(img)
+    for i in range(200):
+        painter.fillRect((i * 37 + seed) % WIDTH, (i * 53) % HEIGHT, 120, 40, QColor(i % 256, seed % 256, 80))
+    painter.end()
+    return img
+
+def png_bytes(qimage):
+    buffer = QBuffer()
+    buffer.open(QBuffer.WriteOnly)
+    qimage.save(buffer, "PNG")
+    return bytes(buffer.data())
+
+class ForeignImageMimeData(QMimeData):
+    # 다른 앱이 올린 이미지처럼 인코딩된 PNG 만 갖고 있고, 요청할 때마다 QImage 로 디코딩
+    def __init__(self, png):
+        super().__init__()
+        self.png = png
+
+    def formats(self):
+        return ["image/png", "application/x-qt-image"]
+
+    def hasFormat(self, fmt):
+        return fmt in self.formats()
+
+    def retrieveData(self, fmt, preferred_type):
+        if fmt == "application/x-qt-image":
+            return QImage.fromData(self.png)
+        if fmt == "image/png":
+            return QByteArray(self.png)
+        return None
+
+def legacy_tick(clipboard, state):
+    from PIL import Image
+    img = clipboard.pixmap()
+    if img and not img.isNull() and (state.get("last") is None or img.toImage() != state["last"].toImage()):
+        state["last"] = img
+        converted = img.toImage()  # 임시 QImage 의 bits() 는 바로 해제되므로 참조를 잡아 둠
+        buffer = converted.bits().asstring(img.width() * img.height() * 4)
+        qimage = img.toImage()
+        byte_array = qimage.bits().asstring(qimage.byteCount())
+        image = Image.frombytes("RGBA", (qimage.width(), qimage.height()), byte_array)
+        return png_bytes(qimage)
+
+def hash_tick(clipboard, state):
+    from clipboard_watcher import image_digest
+    qimage = clipboard.image()
+    digest = image_digest(qimage)
+    if digest is not None and digest != state.get("last"):
+        state["last"] = digest
+        return png_bytes(qimage)
+
+def fingerprint_tick(clipboard, state):
+    from clipboard_watcher import ClipboardImageFingerprint
+    fingerprint = state.setdefault("fingerprint", ClipboardImageFingerprint())
+    digest = fingerprint()
+    if digest is not None and digest != state.get("last"):
+        state["last"] = digest
+        return png_bytes(fingerprint.image)
+
+TICKS_BY_MODE = {"legacy": legacy_tick, "hash": hash_tick, "fingerprint": fingerprint_tick}
+
+def run(mode, source):
+    app = QGuiApplication(sys.argv[:1])
+    clipboard = app.clipboard()
+    tick = TICKS_BY_MODE[mode]
+    images = [make_image(seed) for seed in range(2)]
+    if source == "foreign":
+        pngs = [png_bytes(image) for image in images]
+        set_clipboard = lambda i: clipboard.setMimeData(ForeignImageMimeData(pngs[i]))
+    else:
+        set_clipboard = lambda i: clipboard.setImage(images[i])
+    state = {}
+    set_clipboard(0)
+    tick(clipboard, state)
+
+    # 변경 없는 틱 (대부분의 틱)
+    start = time.process_time()
+    for _ in range(TICKS):
+        tick(clipboard, state)
+    idle = (time.process_time() - start) / TICKS
+
+    # 변경이 있는 틱 (PNG 인코딩 포함)
+    start = time.process_time()
+    for i in range(4):
+        set_clipboard((i + 1) % 2)
+        tick(clipboard, state)
+    changed = (time.process_time() - start) / 4
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{source:>7} {mode:>11} | 변경 없음 {idle * 1000:8.1f} ms/틱 | 변경 {changed * 1000:8.1f} ms/틱 | 최대 RSS {peak_mb:7.1f} MB")
+
+def main():
+    if len(sys.argv) > 2:
+        run(sys.argv[1], sys.argv[2])
+        return
+    print(f"{WIDTH}x{HEIGHT} ARGB32")
+    for source in ("qt", "foreign"):
+        for mode in TICKS_BY_MODE:
+            subprocess.run([sys.executable, os.path.abspath(__file__), mode, source], check=True)
+
+if __name__ == "__main__":
+    main()
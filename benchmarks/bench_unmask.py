@@ -0,0 +1,63 @@
+import os
+import sys
+import re
+import time
+import random
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "masking"))
+from span_masker import restore_tokens
+
+# partial_unmask 기존 방식(findall + 토큰마다 replace) vs 한 번 순회 방식 비교 (1MB 입력)
+TAGS = ["PERSON", "DATE", "LOCATION", "ORGANIZATION", "EMAIL", "PHONE"]
+
+def legacy_unmask(text, cache):
+    restored = text
+    pattern = re.compile(r'\[([A-Z]+)_([a-f0-9]{8})\]')
+    for tag, uid in pattern.findall(text):
+        if uid in cache and cache[uid][0] == tag:
+            word = cache[uid][1]
+            restored = restored.replace(f"[{tag}_{uid}]", word)
+    return restored
+
+def make_input(size, token_count):
+    cache = {}
+    tokens = []
+    for i in range(token_count):
+        uid = str(uuid.uuid4())[:8]
+        tag = random.choice(TAGS)
+        cache[uid] = (tag, f"원문{i}")
+        tokens.append(f"[{tag}_{uid}]")
+    filler = "가나다라마바사 lorem ipsum dolor sit amet. "
+    chunks = []
+    length = 0
+    while length < size:
+        piece = filler if random.random() > 0.3 or not tokens else random.choice(tokens) + " "
+        chunks.append(piece)
+        length += len(piece.encode("utf-8"))
+    return "".join(chunks), cache
+
+def bench(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    random.seed(0)
+    for token_count in (100, 1000, 5000):
+        text, cache = make_input(1024 * 1024, token_count)
+        lookup = lambda uids: {uid: cache[uid] for uid in uids if uid in cache}
+
+        legacy_time, legacy_result = bench(lambda: legacy_unmask(text, cache))
+        new_time, new_result = bench(lambda: restore_tokens(text, lookup))
+        assert legacy_result == new_result
+        print(f"토큰 {token_count:>5}개 | 기존 {legacy_time * 1000:9.1f} ms | 개선 {new_time * 1000:7.1f} ms | {legacy_time / new_time:6.1f}x")
+
+        partial_time, _ = bench(lambda: restore_tokens(text, lookup, {"DATE"}))
+        print(f"            DATE만 복원 {partial_time * 1000:7.1f} ms")
+
+if __name__ == "__main__":
+    main()
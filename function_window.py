@@ -4,45 +4,75 @@ import json
 import subprocess
 import signal
 import datetime
-import requests
 
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QStackedWidget, QLabel, QFileDialog
+    QPushButton, QStackedWidget, QLabel, QFileDialog, QMessageBox
 )
-from PyQt5.QtGui import QPixmap, QFont, QFontDatabase
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer
-from dotenv import load_dotenv
+from PyQt5.QtGui import QImage, QPixmap, QFont, QFontDatabase
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QProcess, QProcessEnvironment
+
+from masking import http_client, img_client, batch_masking, audio_events
 
 class ImageUploadWorker(QThread):
-    finished = pyqtSignal(str)
+    finished = pyqtSignal(QImage, QImage)  # 원본 크기 결과, 미리보기
     error = pyqtSignal(str)
 
-    def __init__(self, server_url, file_path, save_folder):
+    def __init__(self, server_url, file_path, save_folder, preview_size=(600, 400)):
         super().__init__()
         self.server_url = server_url
         self.file_path = file_path
         self.save_folder = save_folder
+        self.preview_size = preview_size
 
     def run(self):
         try:
             with open(self.file_path, "rb") as f:
-                files = {"image": (os.path.basename(self.file_path), f, "image/png")}
-                response = requests.post(self.server_url, files=files)
-
-            if response.status_code == 200:
-                os.makedirs(self.save_folder, exist_ok=True)
-                timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                save_name = f"masked_{timestamp}_{os.path.basename(self.file_path)}"
-                save_path = os.path.join(self.save_folder, save_name)
-                with open(save_path, "wb") as out:
-                    out.write(response.content)
-                self.finished.emit(save_path)
-            else:
-                self.error.emit(f"❌ 서버 오류: {response.status_code}")
+                img_bytes = f.read()
+            result, cached_path = img_client.mask_image(img_bytes, os.path.basename(self.file_path), "image/png", self.server_url)
+
+            # 결과 디코딩/축소를 GUI 스레드 밖에서 처리
+            masked = QImage.fromData(result)
+            if masked.isNull():
+                self.error.emit("❌ 이미지 로딩 실패")
+                return
+            preview = masked.scaled(*self.preview_size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            self.finished.emit(masked, preview)
+
+            # 미리보기를 먼저 띄운 뒤 저장 (캐시 적중이면 이미 디스크에 있음)
+            if cached_path or os.getenv("IMG_SAVE_RESULTS", "1") != "1":
+                return
+            os.makedirs(self.save_folder, exist_ok=True)
+            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            save_name = f"masked_{timestamp}_{os.path.basename(self.file_path)}"
+            save_path = os.path.join(self.save_folder, save_name)
+            with open(save_path, "wb") as out:
+                out.write(result)
+        except img_client.ServerError as e:
+            self.error.emit(f"❌ 서버 오류: {e.status_code}")
         except Exception as e:
             self.error.emit(f"❌ 요청 실패: {e}")
 
+class BatchMaskingWorker(QThread):
+    progress = pyqtSignal(str)
+    finished = pyqtSignal(str)
+
+    def __init__(self, server_url, source, save_folder):
+        super().__init__()
+        self.server_url = server_url
+        self.source = source
+        self.save_folder = save_folder
+
+    def run(self):
+        try:
+            result = batch_masking.run_batch(
+                self.source, self.save_folder, server_url=self.server_url,
+                on_progress=lambda p: self.progress.emit(batch_masking.format_progress(p))
+            )
+            self.finished.emit(f"✅ 일괄 마스킹 완료: {batch_masking.format_progress(result)}")
+        except Exception as e:
+            self.finished.emit(f"❌ 일괄 마스킹 실패: {e}")
+
 class FunctionWindow(QWidget):
     def __init__(self, back_callback=None):
         super().__init__()
@@ -51,6 +81,8 @@ class FunctionWindow(QWidget):
 
         self.text_proc = None
         self.img_proc = None
+        self.voice_proc = None
+        self.masked_image = None
 
         self.reload_selected_fields()
         self.initUI()
@@ -260,6 +292,10 @@ class FunctionWindow(QWidget):
         self.image_upload_btn.setFixedWidth(200)
         self.image_upload_btn.clicked.connect(self.upload_image)
 
+        self.batch_upload_btn = QPushButton("폴더 일괄 마스킹")
+        self.batch_upload_btn.setFixedWidth(200)
+        self.batch_upload_btn.clicked.connect(self.upload_image_folder)
+
         self.img_preview = QLabel()
         self.img_preview.setFixedSize(600, 400)
         self.img_preview.setAlignment(Qt.AlignCenter)
@@ -272,6 +308,7 @@ class FunctionWindow(QWidget):
 
         layout.addWidget(label, alignment=Qt.AlignCenter)
         layout.addWidget(self.image_upload_btn, alignment=Qt.AlignCenter)
+        layout.addWidget(self.batch_upload_btn, alignment=Qt.AlignCenter)
         layout.addWidget(self.img_file_label, alignment=Qt.AlignCenter)
         layout.addWidget(self.img_preview, alignment=Qt.AlignCenter)
         layout.addWidget(self.copy_btn, alignment=Qt.AlignCenter)
@@ -339,8 +376,7 @@ class FunctionWindow(QWidget):
         self.voice_file_label.show()
 
     def upload_image(self):
-        load_dotenv()
-        server_url = os.getenv("IMG_MASKING_SERVER_URL")
+        server_url = http_client.endpoint_url("img_masking")
         if not server_url:
             QMessageBox.critical(self, "에러", "❌ IMG_MASKING_SERVER_URL 환경 변수가 설정되지 않았습니다.")
             return
@@ -370,9 +406,38 @@ class FunctionWindow(QWidget):
         self.upload_worker.error.connect(self.display_error)
         self.upload_worker.start()
 
-    def display_masked_image(self, save_path):
-        pixmap = QPixmap(save_path).scaled(600, 400, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        self.img_preview.setPixmap(pixmap)
+    def upload_image_folder(self):
+        server_url = http_client.endpoint_url("img_masking")
+        if not server_url:
+            QMessageBox.critical(self, "에러", "❌ IMG_MASKING_SERVER_URL 환경 변수가 설정되지 않았습니다.")
+            return
+
+        folder = QFileDialog.getExistingDirectory(self, "이미지 폴더 선택")
+        if not folder:
+            return
+
+        self.img_file_label.setText(f"선택된 폴더: {os.path.basename(folder)}")
+        self.img_preview.clear()
+        self.img_preview.setText("⏳ 일괄 마스킹 준비 중...")
+        self.img_preview.show()
+        self.copy_btn.hide()
+        self.image_upload_btn.hide()
+        self.batch_upload_btn.hide()
+
+        # 중단 후 같은 폴더를 다시 선택하면 끝난 파일은 건너뜀
+        self.batch_worker = BatchMaskingWorker(server_url, folder, "masked_images")
+        self.batch_worker.progress.connect(self.img_preview.setText)
+        self.batch_worker.finished.connect(self.display_batch_result)
+        self.batch_worker.start()
+
+    def display_batch_result(self, message):
+        self.img_preview.setText(message)
+        self.image_upload_btn.show()
+        self.batch_upload_btn.show()
+
+    def display_masked_image(self, masked, preview):
+        self.masked_image = masked
+        self.img_preview.setPixmap(QPixmap.fromImage(preview))
         self.copy_btn.show()
         self.image_upload_btn.show()
 
@@ -381,14 +446,14 @@ class FunctionWindow(QWidget):
         self.image_upload_btn.show()
     
     def copy_preview_image_to_clipboard(self):
-        if not self.img_preview.pixmap():
+        if self.masked_image is None:
             return
         clipboard = QApplication.clipboard()
-        clipboard.setPixmap(self.img_preview.pixmap())
+        clipboard.setImage(self.masked_image)
         print("✅ 미리보기 이미지를 클립보드에 복사했습니다.")
 
     def upload_voice(self):
-        file_path, _ = QFileDialog.getOpenFileName(self, "음성 선택", "", "Audio Files (*.mp3 *.wav *.m4a)")
+        file_path, _ = QFileDialog.getOpenFileName(self, "음성 선택", "", "Audio Files (*.mp3 *.wav *.m4a *.flac *.ogg)")
         if file_path:
             self.voice_file_label.setText(f"선택된 음성: {file_path.split('/')[-1]}")
             self.masked_result_label.setText("⏳ 마스킹 처리 중...")
@@ -400,35 +465,66 @@ class FunctionWindow(QWidget):
             if os.path.exists(result_path):
                 os.remove(result_path)
 
-            #audio_masking.py 실행
+            #audio_masking.py 실행 (조각별 마스킹 결과를 stdout 으로 받아 바로 표시)
             script_path= os.path.abspath("./masking/audio_masking.py")
-            try:
-                subprocess.Popen(
-                    [sys.executable, script_path, "--source", file_path],
-                    stderr=subprocess.DEVNULL
-                )
-                print("🎤 audio_masking.py 실행됨")
-                # 결과 확인용 타이머 시작
-                self.check_result_timer = QTimer(self)
-                self.check_result_timer.timeout.connect(self.check_masking_result)
-                self.check_result_timer.start(2000)  # 2초 간격으로 확인
-
-            except Exception as e:
-                print(f"❌ audio_masking.py 실행 실패: {e}")
-
-    def check_masking_result(self):
+            self.voice_parts = []
+            self.voice_final_text = None
+            self.voice_audio_path = None
+            self.voice_failed = []
+            self.voice_proc = QProcess(self)
+            env = QProcessEnvironment.systemEnvironment()
+            env.insert("PYTHONIOENCODING", "utf-8")
+            env.insert("PYTHONUNBUFFERED", "1")
+            self.voice_proc.setProcessEnvironment(env)
+            self.voice_proc.setStandardErrorFile(QProcess.nullDevice())
+            self.voice_proc.readyReadStandardOutput.connect(self.read_voice_output)
+            self.voice_proc.finished.connect(self.voice_masking_finished)
+            self.voice_proc.errorOccurred.connect(lambda error: print(f"❌ audio_masking.py 실행 실패: {error}"))
+            self.voice_proc.start(sys.executable, [script_path, "--source", file_path])
+            print("🎤 audio_masking.py 실행됨")
+
+    def read_voice_output(self):
+        while self.voice_proc.canReadLine():
+            line = bytes(self.voice_proc.readLine()).decode("utf-8", "replace").rstrip()
+            event = audio_events.parse_line(line)
+            if event is None:
+                continue
+            if event["kind"] == "segment":
+                self.voice_parts.append(event["text"])
+                self.masked_result_label.setText("⏳ 마스킹 처리 중...\n" + " ".join(self.voice_parts))
+            elif event["kind"] == "segment_error":
+                print(f"❌ 음성 조각 처리 실패: {event.get('error')}")
+            elif event["kind"] == "done":
+                self.voice_final_text = event["text"]
+                self.voice_audio_path = event.get("audio")
+                self.voice_failed = event.get("failed", [])
+
+    def voice_masking_finished(self, exit_code, exit_status):
+        self.read_voice_output()
+        result_text = self.voice_final_text
         result_path = "masked_result.txt"
-        if os.path.exists(result_path):
+        if result_text is None and os.path.exists(result_path):
             with open(result_path, "r", encoding="utf-8") as f:
                 result_text = f.read().strip()
-            self.masked_result_label.setText(f"🛡️ 마스킹 결과:\n{result_text}")
+        if result_text is None:
+            self.masked_result_label.setText("❌ 마스킹 실패")
+        elif not result_text and self.voice_failed:
+            # 모든 조각이 음성 인식/NER 에 실패한 경우 빈 결과를 성공처럼 보여주지 않음
+            self.masked_result_label.setText(f"❌ 마스킹 실패: 음성 조각 {len(self.voice_failed)}개를 모두 처리하지 못했습니다")
+        else:
+            self.voice_final_text = result_text
+            label_text = f"🛡️ 마스킹 결과:\n{result_text}"
+            if self.voice_failed:
+                label_text += f"\n\n⚠️ 음성 조각 {len(self.voice_failed)}개 처리 실패 (결과에서 빠짐, 다시 업로드하면 실패한 조각만 다시 처리)"
+            if self.voice_audio_path:
+                label_text += f"\n\n🔊 마스킹된 음성: {self.voice_audio_path}"
+            self.masked_result_label.setText(label_text)
             self.copy_result_btn.show()
-            self.reupload_btn.show()  # 다시 업로드 버튼 표시
-            self.check_result_timer.stop()
+        self.reupload_btn.show()  # 다시 업로드 버튼 표시
 
     def copy_masked_result(self):
         clipboard = QApplication.clipboard()
-        result_text = self.masked_result_label.text().replace("🛡️ 마스킹 결과:\n", "")
+        result_text = getattr(self, "voice_final_text", None) or self.masked_result_label.text().replace("🛡️ 마스킹 결과:\n", "")
         clipboard.setText(result_text)
         print("📋 마스킹 결과 복사 완료")
 
@@ -449,6 +545,8 @@ class FunctionWindow(QWidget):
         if self.text_proc:
             self.text_proc.terminate()
             print("🛑 텍스트 마스킹 프로세스도 함께 종료됨")
+        if self.voice_proc and self.voice_proc.state() != QProcess.NotRunning:
+            self.voice_proc.kill()
         event.accept()
 
     # TODO: 탭 디자인 팀 기호에 맞게 변경
@@ -0,0 +1,17 @@
+import json
+
+# audio_masking.py → GUI(function_window) 로 조각별 마스킹 결과를 stdout 한 줄씩 전달
+# 일반 로그 출력과 구분하기 위해 접두어를 붙인 JSON 한 줄
+EVENT_PREFIX = "@@AUDIO_MASK "
+
+def emit(kind, **fields):
+    print(EVENT_PREFIX + json.dumps(dict(fields, kind=kind), ensure_ascii=False), flush=True)
+
+def parse_line(line):
+    # 이벤트 줄이면 dict, 아니면 None
+    if not line.startswith(EVENT_PREFIX):
+        return None
+    try:
+        return json.loads(line[len(EVENT_PREFIX):])
+    except ValueError:
+        return None
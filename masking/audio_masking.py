@@ -1,58 +1,74 @@
 import os
-import io
-from pydub import AudioSegment
-from google.cloud import speech
-import requests
+import json
+import time
 import argparse
 
-# 인증 키 경로 설정
-os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = "capstone2-461808-885e4052d835.json"
+import audio_events
+import audio_redact
+import audio_vad
+import ner_client
+import stt_backends
+from audio_stream import open_pcm_stream
+from audio_vad import iter_speech_segments
+from stt_engine import iter_ordered
+from ner_cache import NerCache
+from transcript_cache import AudioJobCheckpoint, TranscriptCache
 
 # 설정
 parser = argparse.ArgumentParser()
-parser.add_argument("--source", required=True, help="Path to source audio file (wav)")
+parser.add_argument("--source", required=True, help="Path to source audio file (wav, mp3, m4a ...)")
+parser.add_argument("--concurrency", type=int, default=int(os.getenv("STT_MAX_IN_FLIGHT", "4")), help="동시에 음성 인식할 조각 수")
+parser.add_argument("--stt-backend", default=os.getenv("STT_BACKEND", "google"), choices=sorted(stt_backends.BACKENDS), help="음성 인식 엔진")
+# 음성 파일 마스킹은 켤 때만 (단어 시각 요청, 원본 재디코딩, WAV 저장이 추가됨. ffmpeg 로 읽으면 16kHz 모노로 저장)
+parser.add_argument("--redact", default=os.getenv("AUDIO_REDACT", "off"), choices=audio_redact.REDACT_MODES, help="마스킹된 음성 파일에서 개인정보 구간 처리 방식 (기본 off)")
+parser.add_argument("--audio-output", default="masked_result.wav", help="마스킹된 음성 파일 경로")
 args = parser.parse_args()
 SOURCE_FILE = args.source
-CHUNK_LENGTH_MS = 30 * 1000  # 30초 단위 (ms)
-NER_SERVER_URL = "http://ec2-43-203-236-115.ap-northeast-2.compute.amazonaws.com:8000/ner"
-
-def split_audio(file_path, chunk_length_ms):
-    audio = AudioSegment.from_wav(file_path)
-    chunks = []
-    for i in range(0, len(audio), chunk_length_ms):
-        chunk = audio[i:i + chunk_length_ms]
-        chunk_path = f"chunk_{i//chunk_length_ms}.wav"
-        chunk.export(chunk_path, format="wav")
-        chunks.append(chunk_path)
-    return chunks
-
-def transcribe_chunk(path):
-    client = speech.SpeechClient()
-    with io.open(path, 'rb') as audio_file:
-        content = audio_file.read()
-
-    audio = speech.RecognitionAudio(content=content)
-
-    config = speech.RecognitionConfig(
-        encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
-        sample_rate_hertz=16000,
-        language_code="ko-KR"
-    )
-
-    response = client.recognize(config=config, audio=audio)
-
-    result_texts = []
-    for result in response.results:
-        result_texts.append(result.alternatives[0].transcript)
-    return " ".join(result_texts)
+STT_MAX_IN_FLIGHT = args.concurrency
+REDACT_MODE = args.redact
+WORD_TIMES = REDACT_MODE != "off"  # 음성 마스킹에는 단어별 시각이 필요
+NER_MAX_IN_FLIGHT = int(os.getenv("AUDIO_NER_MAX_IN_FLIGHT", "2"))
+# 텍스트 마스킹(text_masking.NER_CACHE, 4096개)과 상한이 달라 같은 파일을 쓰면 서로의 항목을 밀어내므로 따로 저장
+NER_CACHE = NerCache(path=os.getenv("AUDIO_NER_CACHE_PATH"))
+STT_BACKEND = stt_backends.get_backend(args.stt_backend)
+STT_RETRIES = int(os.getenv("STT_RETRIES", "2"))  # 조각별 재시도 횟수
+TRANSCRIPT_CACHE = TranscriptCache(
+    path=os.getenv("STT_CACHE_PATH", "stt_cache.db"),
+    ttl=float(os.getenv("STT_CACHE_TTL", str(30 * 24 * 60 * 60))),
+)
+
+def transcribe_segment(pcm, key, sample_rate, channels):
+    # (텍스트, 단어 목록, 캐시 적중 여부). 실패하면 재시도 후 예외
+    cached = TRANSCRIPT_CACHE.get(key)
+    if cached is not None:
+        transcript, words = json.loads(cached)
+        return transcript, words, True
+    for attempt in range(STT_RETRIES + 1):
+        try:
+            transcript, words = STT_BACKEND.transcribe(pcm, sample_rate, channels, WORD_TIMES)
+            break
+        except Exception:
+            if attempt == STT_RETRIES:
+                raise
+            time.sleep(min(2 ** attempt, 10))
+    TRANSCRIPT_CACHE.put(key, json.dumps([transcript, words], ensure_ascii=False))
+    return transcript, words, False
 
 def send_to_ner(full_text):
-    response = requests.post(NER_SERVER_URL, json={"text": full_text}, timeout=60)
-    response.raise_for_status()
-    data = response.json()
-    if "ner_result" not in data:
-        raise ValueError("ner_result 없음")
-    return data["ner_result"]
+    cached = NER_CACHE.get(full_text)
+    if cached is not None:
+        print("⚡ NER 캐시 적중")
+        return cached
+    ner_result = ner_client.request_ner(full_text)
+    NER_CACHE.put(full_text, ner_result)
+    return ner_result
+
+def mask_transcript(transcript):
+    # 조각 하나를 NER 에 보내고 (마스킹된 문장, NER 결과) (STT 와 겹쳐서 실행됨)
+    if not transcript.strip():
+        return "", []
+    ner_result = send_to_ner(transcript)
+    return render_masked_sentence(ner_result), ner_result
 
 def render_masked_sentence(ner_result):
     output = []
@@ -64,37 +80,123 @@ def render_masked_sentence(ner_result):
     return "".join(output).replace("  ", " ").strip()
 
 def main():
-    print("🔪 오디오 분할 중...")
     print("SOURCE_FILE 경로:", SOURCE_FILE)
     print("파일 존재 여부:", os.path.exists(SOURCE_FILE))
-    chunk_paths = split_audio(SOURCE_FILE, CHUNK_LENGTH_MS)
+    # ffmpeg 로 16kHz 모노로 디코딩하면서 바로 넘김 (전체 디코딩 결과를 메모리/파일로 만들지 않음)
+    stream = open_pcm_stream(SOURCE_FILE)
+    sample_rate, channels = stream.rate, stream.channels
+    print(f"🎚️ 입력 형식: {sample_rate}Hz, {channels}ch")
+    config = STT_BACKEND.config(sample_rate, channels, WORD_TIMES)  # 엔진/모델이 바뀌면 캐시 키도 바뀜
+    segment_config = dict(config, max_segment_ms=audio_vad.MAX_SEGMENT_MS, vad_threshold_db=audio_vad.THRESHOLD_DB,
+                          vad_min_silence_ms=audio_vad.MIN_SILENCE_MS, vad_pad_ms=audio_vad.PAD_MS)
+    checkpoint = AudioJobCheckpoint(SOURCE_FILE, segment_config)
+    complete, done_count, failed_before = checkpoint.summary()
+    if complete:
+        print(f"♻️ 이전에 완료된 작업: 조각 {done_count}개의 저장된 결과 사용")
+    elif done_count or failed_before:
+        print(f"♻️ 이전 작업 이어서: 완료된 조각 {done_count}개는 저장된 결과 사용"
+              + (f", 실패했던 조각 {[i + 1 for i in failed_before]} 재시도" if failed_before else ""))
+
+    # STT → NER → 출력 을 조각 단위로 이어서 처리
+    # 앞 조각이 NER 중일 때 뒤 조각은 음성 인식 중이고, 마스킹된 조각은 순서대로 바로 GUI 로 전달
+    print(f"🗣️ 음성 인식 시작... ({STT_BACKEND.name}, 동시 {STT_MAX_IN_FLIGHT}개)\n")
+    errors = {}
+    sent_bytes = 0
+    speech_bytes = 0
+    cache_hits = 0
+    reused = 0
+    segment_info = {}  # 순번 -> (시작 ms, 캐시 키, 이전 실행의 완료 항목 또는 None)
+    segment_spans = {}  # 순번 -> 녹음 전체 기준 (시작 초, 끝 초). 실패한 조각을 통째로 가릴 때 사용
+    masked_parts = []
+    redact_ranges = []  # 녹음 전체 기준 (시작 초, 끝 초)
+
+    def speech_segments():
+        # 무음 구간은 건너뛰고 음성 구간만 보냄
+        nonlocal sent_bytes, speech_bytes
+        for i, (offset_ms, pcm) in enumerate(iter_speech_segments(stream)):
+            key = TranscriptCache.key(pcm, config)
+            stored = checkpoint.stored(i, key)
+            segment_info[i] = (offset_ms, key, stored)
+            segment_spans[i] = (offset_ms / 1000, offset_ms / 1000 + len(pcm) / (sample_rate * channels * 2))
+            speech_bytes += len(pcm)
+            if stored is None:
+                sent_bytes += len(pcm)
+            yield pcm, key, stored
+
+    def transcribe(segment):
+        pcm, key, stored = segment
+        if stored is not None:
+            return None  # 이전 실행에서 완료된 조각
+        return transcribe_segment(pcm, key, sample_rate, channels)
 
-    print("🗣️ 음성 인식 시작...\n")
-    full_transcript = ""
-    for i, chunk_path in enumerate(chunk_paths):
-        print(f"🎧 조각 {i+1}/{len(chunk_paths)} 처리 중...")
+    def transcribed():
+        nonlocal cache_hits, reused
+        for i, result, error in iter_ordered(speech_segments(), transcribe, STT_MAX_IN_FLIGHT):
+            offset_ms, key, stored = segment_info.pop(i)
+            if stored is not None:
+                reused += 1
+                yield i, offset_ms, key, None, None, stored
+                continue
+            if error is not None:
+                errors[i] = error
+                checkpoint.mark(i, offset_ms, key, "failed", str(error))
+                print(f"❌ 조각 {i+1}에서 오류 발생: {error}")
+                audio_events.emit("segment_error", index=i, error=str(error))
+                continue
+            transcript, words, cached = result
+            cache_hits += cached
+            print(f"📄 조각 {i+1} 텍스트{' (캐시)' if cached else ''}: {transcript}\n")
+            yield i, offset_ms, key, transcript, words, None
+
+    def mask_item(item):
+        i, offset_ms, key, transcript, words, stored = item
+        if stored is not None:
+            return i, offset_ms, key, stored["masked"], [tuple(r) for r in stored["ranges"]], None
         try:
-            transcript = transcribe_chunk(chunk_path)
-            print(f"📄 조각 {i+1} 텍스트: {transcript}\n")
-            full_transcript += transcript + " "
+            masked, ner_result = mask_transcript(transcript)
+            ranges = audio_redact.pii_time_ranges(ner_result, transcript, words, offset_ms / 1000) if WORD_TIMES else []
+            return i, offset_ms, key, masked, ranges, None
         except Exception as e:
-            print(f"❌ 조각 {i+1}에서 오류 발생: {e}")
-        os.remove(chunk_path)
-
-    print("📝 전체 텍스트 통합 결과:\n")
-    print(full_transcript.strip())
-    print("NER 서버 요청 중...")
-    try:
-        ner_result = send_to_ner(full_transcript)
-        print("마스킹 결과 수신 완료")
-        masked_sentence = render_masked_sentence(ner_result)
-        print("\n🛡️ 마스킹된 문장:\n", masked_sentence)
-        with open("masked_result.txt", "w", encoding="utf-8") as f:
-            f.write(masked_sentence)
-    except Exception as e:
-        print(" 마스킹 실패:", e)
-    
-        return
+            return i, offset_ms, key, None, [], e
+
+    with stream:
+        for _, (i, offset_ms, key, masked, ranges, error), _ in iter_ordered(transcribed(), mask_item, NER_MAX_IN_FLIGHT):
+            if error is not None:
+                errors[i] = error
+                checkpoint.mark(i, offset_ms, key, "failed", str(error))
+                print(f" 조각 {i+1} 마스킹 실패:", error)
+                audio_events.emit("segment_error", index=i, error=str(error))
+                continue
+            checkpoint.mark(i, offset_ms, key, "done", masked=masked, ranges=ranges)
+            redact_ranges.extend(ranges)
+            if masked:
+                masked_parts.append(masked)
+                audio_events.emit("segment", index=i, text=masked)
+
+    checkpoint.finish(errors)
+    if errors:
+        print(f"⚠️ 실패한 조각: {sorted(i + 1 for i in errors)} (다시 실행하면 실패한 조각만 다시 요청)")
+    print(f"⚡ 이전 실행 결과 재사용 {reused}개, 음성 인식 캐시 적중 {cache_hits}개")
+    sent_sec = sent_bytes / (sample_rate * channels * 2)
+    speech_sec = speech_bytes / (sample_rate * channels * 2)
+    total_sec = stream.duration
+    print(f"🔇 음성 인식 전송 {sent_sec:.1f}s / 전체 {total_sec:.1f}s (무음 {max(0.0, total_sec - speech_sec):.1f}s 제외)")
+
+    masked_sentence = " ".join(masked_parts)
+    print("\n🛡️ 마스킹된 문장:\n", masked_sentence)
+    with open("masked_result.txt", "w", encoding="utf-8") as f:
+        f.write(masked_sentence)
+
+    audio_path = None
+    if REDACT_MODE != "off":
+        # 인식/마스킹에 실패한 조각은 개인정보 위치를 알 수 없으므로 조각 전체를 가림
+        if errors:
+            redact_ranges.extend(segment_spans[i] for i in errors)
+            print(f"⚠️ 실패한 조각 {sorted(i + 1 for i in errors)} 은 음성 파일에서 조각 전체를 가렸습니다")
+        redacted_sec = audio_redact.write_redacted_wav(SOURCE_FILE, args.audio_output, redact_ranges, REDACT_MODE)
+        audio_path = os.path.abspath(args.audio_output)
+        print(f"🔊 마스킹된 음성 저장: {audio_path} ({len(redact_ranges) - len(errors)}개 단어, {redacted_sec:.1f}s 가림)")
+    audio_events.emit("done", text=masked_sentence, failed=sorted(errors), audio=audio_path)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,106 @@
+import os
+import wave
+
+import numpy as np
+
+from audio_stream import open_pcm_stream
+
+# 원본 녹음에서 개인정보 단어 구간을 삐 소리(tone) 또는 무음(silence)으로 덮은 WAV 생성
+# NER 결과 → 문자 위치 → STT 단어 시각 순서로 대응시키고, 원본은 블록 단위로 읽으면서 덮어써서 메모리 사용량이 일정함
+REDACT_MODES = ("tone", "silence", "off")
+TONE_HZ = float(os.getenv("AUDIO_REDACT_TONE_HZ", "1000"))
+TONE_LEVEL = float(os.getenv("AUDIO_REDACT_TONE_LEVEL", "0.2"))  # 최대 음량 대비
+PAD_SEC = float(os.getenv("AUDIO_REDACT_PAD_SEC", "0.1"))  # 단어 시각 오차를 감안해 앞뒤로 더 덮음
+BLOCK_SEC = 10
+
+def masked_char_ranges(ner_result, text):
+    # NER 에서 태그가 붙은 단어의 (시작, 끝) 문자 위치
+    ranges = []
+    cursor = 0
+    for word, tag in ner_result:
+        found = text.find(word, cursor) if word else -1
+        if found == -1:
+            continue
+        cursor = found + len(word)
+        if tag != "O" and word.strip():
+            ranges.append((found, cursor))
+    return ranges
+
+def word_char_spans(words, text):
+    # STT 단어 [(단어, 시작 초, 끝 초)] 각각의 문자 위치. 텍스트에서 못 찾은 단어는 None
+    spans = []
+    cursor = 0
+    for word, _, _ in words:
+        found = text.find(word, cursor) if word else -1
+        if found == -1:
+            spans.append(None)
+            continue
+        cursor = found + len(word)
+        spans.append((found, cursor))
+    return spans
+
+def pii_time_ranges(ner_result, text, words, offset_sec=0.0, pad_sec=PAD_SEC):
+    # 태그가 붙은 문자 구간과 겹치는 STT 단어의 (시작 초, 끝 초). offset_sec 는 조각의 녹음 내 시작 위치
+    char_ranges = masked_char_ranges(ner_result, text)
+    if not char_ranges:
+        return []
+    ranges = []
+    for (word, start, end), span in zip(words, word_char_spans(words, text)):
+        if span is None:
+            continue
+        if any(span[0] < r_end and r_start < span[1] for r_start, r_end in char_ranges):
+            ranges.append((max(0.0, offset_sec + start - pad_sec), offset_sec + end + pad_sec))
+    return ranges
+
+def merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [tuple(r) for r in merged]
+
+def redact_block(samples, first_frame, rate, starts, ends, mode="tone"):
+    # samples: (프레임 수, 채널 수) int16 블록, first_frame: 녹음 내 블록 시작 프레임
+    # starts/ends: 정렬·병합된 구간의 프레임 번호 배열. 겹치는 구간 경계를 +1/-1 로 찍고 누적합으로 마스크를 만듦
+    count = len(samples)
+    lo = np.searchsorted(ends, first_frame, side="right")
+    hi = np.searchsorted(starts, first_frame + count, side="left")
+    if lo >= hi:
+        return samples
+    edges = np.zeros(count + 1, dtype=np.int32)
+    np.add.at(edges, np.clip(starts[lo:hi] - first_frame, 0, count), 1)
+    np.add.at(edges, np.clip(ends[lo:hi] - first_frame, 0, count), -1)
+    mask = np.cumsum(edges[:-1]) > 0
+    if mode == "silence":
+        samples[mask] = 0
+    else:
+        # 위상은 녹음 전체 기준이라 블록 경계에서 끊기지 않음
+        t = (first_frame + np.flatnonzero(mask)) / rate
+        tone = (np.sin(2 * np.pi * TONE_HZ * t) * 32767 * TONE_LEVEL).astype(np.int16)
+        samples[mask] = tone[:, None]
+    return samples
+
+def write_redacted_wav(source, output_path, ranges, mode="tone"):
+    # 원본을 다시 디코딩하면서 블록마다 구간을 덮어 WAV 로 저장. 덮은 길이(초) 반환
+    ranges = merge_ranges(ranges)
+    with open_pcm_stream(source) as stream, wave.open(output_path, "wb") as out:
+        rate, channels = stream.rate, stream.channels
+        out.setnchannels(channels)
+        out.setsampwidth(2)
+        out.setframerate(rate)
+        starts = np.array([int(start * rate) for start, _ in ranges], dtype=np.int64)
+        ends = np.array([int(np.ceil(end * rate)) for _, end in ranges], dtype=np.int64)
+        block_frames = rate * BLOCK_SEC
+        first_frame = 0
+        while True:
+            pcm = stream.read(block_frames)
+            if not pcm:
+                break
+            samples = np.frombuffer(pcm, dtype="<i2").copy()
+            samples = samples[: len(samples) // channels * channels].reshape(-1, channels)
+            out.writeframes(redact_block(samples, first_frame, rate, starts, ends, mode).tobytes())
+            first_frame += len(samples)
+        total = first_frame
+    return float(np.minimum(ends, total).sum() - np.minimum(starts, total).sum()) / rate if ranges else 0.0
@@ -0,0 +1,94 @@
+import os
+import wave
+import shutil
+import subprocess
+
+# 오디오를 파일 전체를 읽지 않고 조각 단위로 읽어서 LINEAR16 바이트로 넘김 (임시 파일 없음)
+# ffmpeg 가 있으면 mp3/m4a/wav 등 어떤 형식이든 파이프로 디코딩하면서 16kHz 모노 16bit 로 변환
+# ffmpeg 가 없으면 16bit PCM WAV 만 원본 샘플레이트/채널 그대로 읽음
+TARGET_RATE = int(os.getenv("AUDIO_TARGET_RATE", "16000"))
+FFMPEG_BIN = os.getenv("FFMPEG_BIN", "ffmpeg")
+
+def find_ffmpeg():
+    return shutil.which(FFMPEG_BIN)
+
+class PcmStream:
+    # read(프레임 수) -> LINEAR16 바이트 (끝이면 b""). rate/channels 는 실제로 넘기는 형식
+    def __init__(self, path):
+        self.path = path
+        self.frames_read = 0
+        self._proc = None
+        self._wav = None
+        ffmpeg = find_ffmpeg()
+        if ffmpeg:
+            self.rate, self.channels = TARGET_RATE, 1
+            self._proc = subprocess.Popen(
+                [ffmpeg, "-nostdin", "-v", "error", "-i", path,
+                 "-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(TARGET_RATE), "pipe:1"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+        else:
+            try:
+                self._wav = wave.open(path, "rb")
+            except (wave.Error, EOFError) as e:
+                raise ValueError(f"ffmpeg 가 없어서 WAV 파일만 읽을 수 있습니다: {path}") from e
+            if self._wav.getsampwidth() != 2:
+                self._wav.close()
+                raise ValueError(f"16bit PCM WAV 만 지원합니다 (현재 {self._wav.getsampwidth() * 8}bit)")
+            self.rate, self.channels = self._wav.getframerate(), self._wav.getnchannels()
+
+    @property
+    def frame_bytes(self):
+        return self.channels * 2
+
+    @property
+    def duration(self):
+        # 지금까지 읽은 길이 (초)
+        return self.frames_read / self.rate
+
+    def read(self, frames):
+        if self._wav is not None:
+            pcm = self._wav.readframes(frames)
+        else:
+            pcm = self._read_pipe(frames * self.frame_bytes)
+        self.frames_read += len(pcm) // self.frame_bytes
+        return pcm
+
+    def _read_pipe(self, size):
+        # 파이프는 요청한 만큼 한 번에 오지 않을 수 있으므로 채워질 때까지 읽음
+        parts = []
+        while size > 0:
+            data = self._proc.stdout.read(size)
+            if not data:
+                break
+            parts.append(data)
+            size -= len(data)
+        pcm = b"".join(parts)
+        if not pcm:
+            self._check_exit()
+        return pcm
+
+    def _check_exit(self):
+        error = self._proc.stderr.read().decode("utf-8", "replace").strip()
+        if self._proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg 디코딩 실패: {error or self._proc.returncode}")
+
+    def close(self):
+        if self._wav is not None:
+            self._wav.close()
+        if self._proc is not None:
+            if self._proc.poll() is None:
+                self._proc.kill()
+            self._proc.stdout.close()
+            self._proc.stderr.close()
+            self._proc.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_pcm_stream(path):
+    return PcmStream(path)
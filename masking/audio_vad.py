@@ -0,0 +1,84 @@
+import os
+from collections import deque
+
+import numpy as np
+
+# 에너지 기반 음성 구간 분할
+# - 고정 30초 대신 무음에서 자르므로 단어 중간이 잘리지 않음
+# - 긴 무음 구간은 음성 인식으로 보내지 않음
+# 스트림(audio_stream.PcmStream)을 블록 단위로 읽으면서 조각을 바로 넘김
+FRAME_MS = int(os.getenv("VAD_FRAME_MS", "30"))
+THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", "-45"))  # 프레임 RMS(dBFS)가 이보다 크면 음성
+MIN_SILENCE_MS = int(os.getenv("VAD_MIN_SILENCE_MS", "500"))  # 이만큼 조용하면 구간을 끝냄
+PAD_MS = int(os.getenv("VAD_PAD_MS", "200"))  # 구간 앞뒤에 남겨 둘 여유 (말 시작/끝 자음)
+MAX_SEGMENT_MS = int(os.getenv("VAD_MAX_SEGMENT_MS", "30000"))  # 이 안에서 가장 조용한 위치를 찾아 자름
+BLOCK_FRAMES = 256  # 한 번에 읽어서 에너지를 계산할 프레임 수
+
+def frame_energies(pcm, channels, samples_per_frame):
+    # 프레임별 RMS (dBFS). 채널은 평균해서 모노로 계산
+    samples = np.frombuffer(pcm, dtype="<i2").astype(np.float32)
+    samples = samples[: len(samples) // channels * channels].reshape(-1, channels).mean(axis=1)
+    count = len(samples) // samples_per_frame
+    frames = samples[: count * samples_per_frame].reshape(count, samples_per_frame)
+    rms = np.sqrt(np.mean(frames * frames, axis=1)) / 32768.0
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+def iter_speech_segments(stream, max_segment_ms=MAX_SEGMENT_MS, threshold_db=THRESHOLD_DB,
+                         min_silence_ms=MIN_SILENCE_MS, pad_ms=PAD_MS, frame_ms=FRAME_MS):
+    # (시작 위치 ms, LINEAR16 바이트) 생성. 무음만 있는 구간은 생성하지 않음
+    rate, channels = stream.rate, stream.channels
+    samples_per_frame = max(1, rate * frame_ms // 1000)
+    frame_bytes = samples_per_frame * channels * 2
+    max_frames = max(1, max_segment_ms // frame_ms)
+    silence_frames = max(1, min_silence_ms // frame_ms)
+    pad_frames = pad_ms // frame_ms
+
+    preroll = deque(maxlen=pad_frames)  # 음성 시작 직전 프레임
+    segment = []  # [(프레임 번호, 바이트, dB)]
+    silence_run = 0
+    index = 0
+
+    def emit(frames):
+        # 프레임 길이는 정수 샘플 수라 frame_ms 와 조금 다를 수 있음 (22050Hz: 661샘플 = 29.98ms) → 샘플 수로 계산
+        return frames[0][0] * samples_per_frame * 1000 / rate, b"".join(pcm for _, pcm, _ in frames)
+
+    while True:
+        block = stream.read(samples_per_frame * BLOCK_FRAMES)
+        if not block:
+            break
+        if len(block) % frame_bytes:
+            block += b"\x00" * (frame_bytes - len(block) % frame_bytes)  # 마지막 프레임은 0으로 채움
+        energies = frame_energies(block, channels, samples_per_frame)
+        for offset, db in enumerate(energies.tolist()):
+            frame = (index, block[offset * frame_bytes:(offset + 1) * frame_bytes], db)
+            index += 1
+            speech = db > threshold_db
+
+            if not segment:
+                if speech:
+                    segment = list(preroll) + [frame]
+                    preroll.clear()
+                    silence_run = 0
+                else:
+                    preroll.append(frame)
+                continue
+
+            segment.append(frame)
+            silence_run = 0 if speech else silence_run + 1
+            if silence_run >= silence_frames:
+                # 말이 끝남: 뒤쪽 무음은 여유분만 남기고 버림
+                keep = len(segment) - silence_run + pad_frames
+                yield emit(segment[:keep])
+                preroll.clear()
+                preroll.extend(segment[len(segment) - pad_frames:])
+                segment = []
+            elif len(segment) >= max_frames:
+                # 최대 길이 도달: 뒤쪽 절반에서 가장 조용한 프레임에서 자름
+                half = len(segment) // 2
+                cut = half + int(np.argmin([db for _, _, db in segment[half:]]))
+                yield emit(segment[:cut + 1])
+                segment = segment[cut + 1:]
+                silence_run = min(silence_run, len(segment))
+
+    if segment and any(db > threshold_db for _, _, db in segment):
+        yield emit(segment[: len(segment) - max(0, silence_run - pad_frames)])
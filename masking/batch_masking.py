@@ -0,0 +1,160 @@
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    from masking import img_client
+except ImportError:  # masking 폴더의 스크립트로 실행된 경우
+    import img_client
+
+# 폴더/글롭 단위 이미지 일괄 마스킹
+# - 동시 요청 수 제한, 파일별 재시도
+# - 완료 목록(batch_progress.json)을 저장해서 중단 후 다시 실행하면 이어서 처리
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+MANIFEST_NAME = "batch_progress.json"
+
+def collect_files(source):
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)]
+    else:
+        paths = glob.glob(source, recursive=True)
+    return sorted(os.path.abspath(p) for p in paths if os.path.isfile(p) and p.lower().endswith(IMAGE_EXTENSIONS))
+
+def output_names(files):
+    # 같은 파일명이 여러 폴더에 있어도 겹치지 않도록 번호를 붙임 (정렬 순서 기준이라 재실행해도 동일)
+    names = {}
+    used = set()
+    for path in files:
+        stem, ext = os.path.splitext(os.path.basename(path))
+        name = f"masked_{stem}{ext}"
+        n = 1
+        while name in used:
+            name = f"masked_{stem}_{n}{ext}"
+            n += 1
+        used.add(name)
+        names[path] = name
+    return names
+
+class BatchManifest:
+    def __init__(self, output_dir):
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.lock = threading.Lock()
+        self.done = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.done = json.load(f)
+            except (OSError, ValueError):
+                self.done = {}
+
+    @staticmethod
+    def signature(path):
+        stat = os.stat(path)
+        return [stat.st_size, int(stat.st_mtime)]
+
+    def is_done(self, path):
+        entry = self.done.get(path)
+        return bool(entry) and entry["source"] == self.signature(path) and os.path.exists(entry["output"])
+
+    def mark_done(self, path, output_path):
+        with self.lock:
+            self.done[path] = {"source": self.signature(path), "output": output_path}
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.done, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+
+def mask_file(path, output_path, server_url=None, retries=3):
+    with open(path, "rb") as f:
+        img_bytes = f.read()
+    mime = "image/jpeg" if path.lower().endswith((".jpg", ".jpeg")) else "image/png"
+    for attempt in range(retries + 1):
+        try:
+            result, _ = img_client.mask_image(img_bytes, os.path.basename(path), mime, server_url)
+            break
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(min(2 ** attempt, 10))
+    with open(output_path, "wb") as out:
+        out.write(result)
+    return len(img_bytes)
+
+def run_batch(source, output_dir="masked_images", workers=4, retries=3, server_url=None, on_progress=None):
+    # on_progress(진행 상황 dict) 는 파일 하나가 끝날 때마다 호출됨
+    os.makedirs(output_dir, exist_ok=True)
+    output_abs = os.path.abspath(output_dir)
+    files = [path for path in collect_files(source) if os.path.dirname(path) != output_abs]
+    names = output_names(files)
+    manifest = BatchManifest(output_dir)
+    pending = [path for path in files if not manifest.is_done(path)]
+
+    progress = {
+        "total": len(files),
+        "done": len(files) - len(pending),
+        "skipped": len(files) - len(pending),
+        "failed": [],
+        "bytes": 0,
+        "elapsed": 0.0,
+        "files_per_sec": 0.0,
+        "mb_per_sec": 0.0,
+    }
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {
+            pool.submit(mask_file, path, os.path.join(output_dir, names[path]), server_url, retries): path
+            for path in pending
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                progress["bytes"] += future.result()
+                manifest.mark_done(path, os.path.join(output_dir, names[path]))
+            except Exception as e:
+                progress["failed"].append((path, str(e)))
+            progress["done"] += 1
+            elapsed = time.perf_counter() - start
+            processed = progress["done"] - progress["skipped"]
+            progress["elapsed"] = elapsed
+            progress["files_per_sec"] = processed / elapsed if elapsed else 0.0
+            progress["mb_per_sec"] = progress["bytes"] / 1024 / 1024 / elapsed if elapsed else 0.0
+            if on_progress:
+                on_progress(dict(progress, current=path))
+    return progress
+
+def format_progress(progress):
+    return (
+        f"{progress['done']}/{progress['total']} 완료"
+        f" (실패 {len(progress['failed'])}, 이전 실행 {progress['skipped']})"
+        f" | {progress['files_per_sec']:.2f}장/s, {progress['mb_per_sec']:.2f}MB/s"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="이미지 폴더 일괄 마스킹")
+    parser.add_argument("--source", required=True, help="이미지 폴더 또는 글롭 패턴 (예: 'shots/**/*.png')")
+    parser.add_argument("--output", default="masked_images", help="결과 저장 폴더")
+    parser.add_argument("--workers", type=int, default=4, help="동시 요청 수")
+    parser.add_argument("--retries", type=int, default=3, help="파일별 재시도 횟수")
+    args = parser.parse_args()
+
+    if not img_client.http_client.endpoint_url("img_masking"):
+        print("❌ IMG_MASKING_SERVER_URL 환경 변수가 설정되지 않았습니다.")
+        sys.exit(1)
+
+    print(f"🗂️ 일괄 마스킹 시작: {args.source}")
+    progress = run_batch(
+        args.source, args.output, args.workers, args.retries,
+        on_progress=lambda p: print(f"🖼️ {format_progress(p)} - {os.path.basename(p['current'])}"),
+    )
+    print(f"✅ 완료: {format_progress(progress)}")
+    for path, error in progress["failed"]:
+        print(f"❌ {path}: {error}")
+    sys.exit(1 if progress["failed"] else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+# 모든 마스킹 요청이 공유하는 HTTP 세션 (keep-alive 커넥션 재사용)
+load_dotenv()
+
+ENDPOINTS = {
+    "ner": os.getenv("NER_SERVER_URL", "http://ec2-43-203-236-115.ap-northeast-2.compute.amazonaws.com:8000/ner"),
+    "img_masking": os.getenv("IMG_MASKING_SERVER_URL"),
+    "stt": os.getenv("STT_SERVER_URL", "http://127.0.0.1:8765/stt"),  # STT_BACKEND=http (stt_stub_server.py 등)
+}
+# (연결, 응답) 타임아웃 (초)
+TIMEOUTS = {
+    "ner": (float(os.getenv("NER_CONNECT_TIMEOUT", "5")), float(os.getenv("NER_TIMEOUT", "60"))),
+    "img_masking": (float(os.getenv("IMG_MASKING_CONNECT_TIMEOUT", "5")), float(os.getenv("IMG_MASKING_TIMEOUT", "120"))),
+    "stt": (float(os.getenv("STT_CONNECT_TIMEOUT", "5")), float(os.getenv("STT_TIMEOUT", "120"))),
+}
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "8"))
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=len(ENDPOINTS), pool_maxsize=POOL_SIZE)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+def endpoint_url(name):
+    return ENDPOINTS.get(name)
+
+def post(name, url=None, **kwargs):
+    kwargs.setdefault("timeout", TIMEOUTS[name])
+    return get_session().post(url or ENDPOINTS[name], **kwargs)
@@ -0,0 +1,96 @@
+import io
+import os
+import hashlib
+
+# 마스킹된 이미지 결과 캐시 (원본 이미지 해시 -> 마스킹 결과 파일)
+# 파일명: <sha256>_<dhash>_<가로>x<세로>.<확장자>
+# 별도 인덱스 없이 파일명/수정 시각만 사용하므로 여러 프로세스가 같은 폴더를 써도 안전
+class ImageResultCache:
+    def __init__(self, folder="masked_images/.cache", max_bytes=512 * 1024 * 1024, perceptual=False, max_distance=0):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        # perceptual: 재인코딩된 같은 스크린샷도 적중. 비슷하지만 다른 이미지에 옛 결과를
+        # 돌려줄 수 있으므로 기본은 꺼 두고, 거리도 보수적으로 설정
+        self.perceptual = perceptual
+        self.max_distance = max_distance
+        os.makedirs(folder, exist_ok=True)
+
+    @staticmethod
+    def content_hash(img_bytes):
+        return hashlib.sha256(img_bytes).hexdigest()
+
+    @staticmethod
+    def describe(img_bytes):
+        # (dHash 64비트, 가로, 세로). 이미지로 읽을 수 없으면 None
+        from PIL import Image
+        try:
+            with Image.open(io.BytesIO(img_bytes)) as image:
+                size = image.size
+                gray = image.convert("L").resize((9, 8))
+        except Exception:
+            return None
+        pixels = list(gray.getdata())
+        bits = 0
+        for row in range(8):
+            for col in range(8):
+                bits = (bits << 1) | (pixels[row * 9 + col] < pixels[row * 9 + col + 1])
+        return bits, size[0], size[1]
+
+    def _entries(self):
+        for entry in os.scandir(self.folder):
+            if entry.name.endswith(".tmp"):
+                continue
+            parts = entry.name.partition(".")[0].split("_")
+            if len(parts) != 3:
+                continue
+            yield entry, parts
+
+    def get(self, img_bytes):
+        # 적중 시 결과 파일 경로, 아니면 None
+        sha = self.content_hash(img_bytes)
+        description = self.describe(img_bytes) if self.perceptual else None
+
+        best = None
+        for entry, (entry_sha, entry_hash, entry_size) in self._entries():
+            if entry_sha == sha:
+                best = entry.path
+                break
+            if description is None:
+                continue
+            phash, width, height = description
+            if entry_size != f"{width}x{height}":
+                continue
+            if bin(int(entry_hash, 16) ^ phash).count("1") <= self.max_distance:
+                best = entry.path
+        if best is not None:
+            os.utime(best)  # LRU 순서 갱신
+        return best
+
+    def put(self, img_bytes, result_bytes):
+        sha = self.content_hash(img_bytes)
+        description = (self.describe(img_bytes) if self.perceptual else None) or (0, 0, 0)
+        ext = "png"
+        if result_bytes[:2] == b"\xff\xd8":
+            ext = "jpg"
+        path = os.path.join(self.folder, f"{sha}_{description[0]:016x}_{description[1]}x{description[2]}.{ext}")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(result_bytes)
+        os.replace(tmp_path, path)
+        self.evict()
+        return path
+
+    def evict(self):
+        # 용량 상한을 넘으면 가장 오래 안 쓴 파일부터 삭제
+        entries = [entry for entry, _ in self._entries()]
+        total = sum(entry.stat().st_size for entry in entries)
+        if total <= self.max_bytes:
+            return
+        for entry in sorted(entries, key=lambda e: e.stat().st_mtime):
+            try:
+                total -= entry.stat().st_size
+                os.remove(entry.path)
+            except OSError:
+                continue
+            if total <= self.max_bytes:
+                break
@@ -0,0 +1,58 @@
+import os
+import threading
+
+try:
+    from masking import http_client, img_preprocess, img_tiling
+    from masking.img_cache import ImageResultCache
+except ImportError:  # masking 폴더의 스크립트로 실행된 경우
+    import http_client
+    import img_preprocess
+    import img_tiling
+    from img_cache import ImageResultCache
+
+# 이미지 마스킹 서버 요청 공통 처리 (img_masking.MaskingWorker, function_window.ImageUploadWorker)
+class ServerError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"서버 오류: {status_code}")
+        self.status_code = status_code
+
+_result_cache = None
+
+def get_result_cache():
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ImageResultCache(
+            folder=os.getenv("IMG_CACHE_DIR", "masked_images/.cache"),
+            max_bytes=int(os.getenv("IMG_CACHE_MAX_MB", "512")) * 1024 * 1024,
+            perceptual=os.getenv("IMG_CACHE_PERCEPTUAL", "0") == "1",
+            max_distance=int(os.getenv("IMG_CACHE_MAX_DISTANCE", "2")),
+        )
+    return _result_cache
+
+def mask_image(img_bytes, filename="clipboard.png", mime="image/png", server_url=None):
+    # (마스킹 결과 바이트, 캐시 파일 경로 또는 None). 캐시 적중 시 서버 요청 없음
+    cache = get_result_cache()
+    cached_path = cache.get(img_bytes)
+    if cached_path:
+        print(f"⚡ 이미지 캐시 적중: {cached_path}")
+        with open(cached_path, "rb") as f:
+            return f.read(), cached_path
+
+    if img_tiling.needs_tiling(img_bytes):
+        result = img_tiling.mask_tiled(img_bytes, lambda tile: mask_once(tile, filename, "image/png", server_url))
+    else:
+        result = mask_once(img_bytes, filename, mime, server_url)
+    # 캐시 파일 쓰기는 결과 반환을 막지 않도록 백그라운드에서
+    threading.Thread(target=cache.put, args=(img_bytes, result), daemon=True).start()
+    return result, None
+
+def mask_once(img_bytes, filename, mime, server_url):
+    # 축소/재인코딩한 이미지를 보내고, 결과는 원본 해상도로 되돌림
+    upload_bytes, upload_mime, context = img_preprocess.prepare_upload(img_bytes)
+    if context is not None:
+        print(f"📦 업로드 크기 {len(img_bytes) // 1024}KB → {len(upload_bytes) // 1024}KB")
+    files = {"image": (filename, upload_bytes, upload_mime or mime)}
+    res = http_client.post("img_masking", url=server_url, files=files)
+    if res.status_code != 200:
+        raise ServerError(res.status_code)
+    return img_preprocess.restore_result(res.content, context)
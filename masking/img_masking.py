@@ -2,41 +2,68 @@ import os
 import sys
 import time
 import datetime
-import requests
-from PIL import Image
-from dotenv import load_dotenv
+import threading
+from collections import deque
 
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QLabel, QPushButton, QTabWidget, QMessageBox
 )
-from PyQt5.QtGui import QPixmap, QFontDatabase, QFont
-from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal
-
-# TODO: 발표 시간 맞춰서 변경 필요
-interrupt_delay = 5000
+from PyQt5.QtGui import QImage, QPixmap, QFontDatabase, QFont
+from PyQt5.QtCore import Qt, QThread, QBuffer, pyqtSignal
+
+import http_client
+import img_client
+from clipboard_watcher import ClipboardImageFingerprint, ClipboardWatcher
+
+# 클립보드 이미지 대기열 설정
+QUEUE_WORKERS = int(os.getenv("IMG_QUEUE_WORKERS", "2"))  # 동시에 처리할 이미지 수
+QUEUE_MAX_PENDING = int(os.getenv("IMG_QUEUE_MAX_PENDING", "20"))  # 넘치면 가장 오래 기다린 이미지부터 건너뜀
+SAVE_RESULTS = os.getenv("IMG_SAVE_RESULTS", "1") == "1"  # masked_images/ 에 결과 파일 저장 여부
+PREVIEW_WIDTH, PREVIEW_HEIGHT = 500, 400
+
+def qimage_to_bytes(qimage):
+    buffer = QBuffer()
+    buffer.open(QBuffer.WriteOnly)
+    qimage.save(buffer, "PNG")
+    return bytes(buffer.data())
+
+def write_result(path, data):
+    try:
+        with open(path, "wb") as out:
+            out.write(data)
+    except OSError as e:
+        print(f"⚠️ 결과 저장 실패: {path} ({e})")
 
 class MaskingWorker(QThread):
-    finished = pyqtSignal(str)
-    error = pyqtSignal(str)
+    finished = pyqtSignal(int, QImage, QImage)  # seq, 원본 크기 결과, 미리보기
+    error = pyqtSignal(int, str)
 
-    def __init__(self, server_url, img_data, save_path):
+    def __init__(self, server_url, qimage, save_path, seq):
         super().__init__()
         self.server_url = server_url
-        self.img_data = img_data
+        self.qimage = qimage
         self.save_path = save_path
+        self.seq = seq
 
     def run(self):
         try:
-            files = {"image": ("clipboard.png", self.img_data, "image/png")}
-            res = requests.post(self.server_url, files=files)
-            if res.status_code == 200:
-                with open(self.save_path, "wb") as out:
-                    out.write(res.content)
-                self.finished.emit(self.save_path)
-            else:
-                self.error.emit(f"❌ 서버 오류: {res.status_code}")
+            # PNG 인코딩, 결과 디코딩/축소 모두 GUI 스레드 밖에서 처리
+            img_data = qimage_to_bytes(self.qimage)
+            result, cached_path = img_client.mask_image(img_data, "clipboard.png", "image/png", self.server_url)
+            masked = QImage.fromData(result)
+            if masked.isNull():
+                self.error.emit(self.seq, "❌ 이미지 로딩 실패")
+                return
+            preview = masked.scaled(PREVIEW_WIDTH, PREVIEW_HEIGHT, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            self.finished.emit(self.seq, masked, preview)
+
+            # 저장은 별도 스레드에서 (finish_job 의 wait() 가 파일 쓰기를 기다리지 않도록). 캐시 적중이면 이미 디스크에 있음
+            if SAVE_RESULTS and not cached_path:
+                threading.Thread(target=write_result, args=(self.save_path, result), daemon=True).start()
+        except img_client.ServerError as e:
+            self.error.emit(self.seq, f"❌ 서버 오류: {e.status_code}")
         except Exception as e:
-            self.error.emit(f"❌ 요청 실패: {e}")
+            self.error.emit(self.seq, f"❌ 요청 실패: {e}")
 
 class ImageMaskingApp(QWidget):
     def __init__(self):
@@ -44,9 +71,8 @@ class ImageMaskingApp(QWidget):
         self.setWindowTitle("Erase Me: Image Masking")
         self.resize(600, 500)
 
-        # 환경변수 로드
-        load_dotenv()
-        self.server_url = os.getenv("IMG_MASKING_SERVER_URL")
+        # 환경변수(.env)는 http_client 에서 로드
+        self.server_url = http_client.endpoint_url("img_masking")
         if not self.server_url:
             QMessageBox.critical(self, "에러", "❌ IMG_MASKING_SERVER_URL 환경 변수가 설정되지 않았습니다.")
             sys.exit(1)
@@ -83,38 +109,66 @@ class ImageMaskingApp(QWidget):
         self.setLayout(self.layout)
 
         # 상태 변수
-        clipboard = QApplication.clipboard()
-        self.last_clip = clipboard.pixmap()  # macOS 호환을 위해 QClipboard 사용
-        self.is_processing = False
+        self.clipboard_fingerprint = ClipboardImageFingerprint()  # macOS 호환을 위해 QClipboard 사용
+        self.last_digest = self.clipboard_fingerprint()
+        self.own_digests = set()  # 직접 클립보드에 넣은 마스킹 결과 (다시 마스킹하지 않음)
         self.is_internal_copy = False
-
-        # 타이머로 감시
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.monitor_clipboard)
-        self.timer.start(500)  # 0.5초마다 감시
-
-    def monitor_clipboard(self):
-        if self.is_processing or self.is_internal_copy:
-            return  # 처리 중이거나 내부 복사 시 감시 중단
-
-        clipboard = QApplication.clipboard()
-        img = clipboard.pixmap()
-        if img and not img.isNull() and (self.last_clip is None or img.toImage() != self.last_clip.toImage()):
-            self.last_clip = img
-
-            # 이미지 데이터를 PNG로 변환
-            buffer = img.toImage().bits().asstring(img.width() * img.height() * 4)
-            qimage = img.toImage()
-            byte_array = qimage.bits().asstring(qimage.byteCount())
-            image = Image.frombytes("RGBA", (qimage.width(), qimage.height()), byte_array)
-            img_data = self.qimage_to_bytes(qimage)
+        self.pending = deque()  # (digest, QImage) - 복사된 순서대로 대기
+        self.running = {}  # seq -> (digest, MaskingWorker)
+        self.results = {}  # seq -> ((결과, 미리보기), 오류 메시지). 순서대로 표시하기 위해 보관
+        self.masked_image = None  # 클립보드 복사용 원본 크기 결과
+        self.next_seq = 0
+        self.next_display = 0
+
+        # 클립보드 변경 알림으로 감시 (알림이 없는 환경에서는 적응형 폴링)
+        self.watcher = ClipboardWatcher(fingerprint=self.clipboard_fingerprint, parent=self)
+        self.watcher.changed.connect(self.monitor_clipboard)
+
+    def monitor_clipboard(self, digest=None):
+        # 픽셀 비교 대신 해시로 변경 여부 판단. 폴링 모드면 폴링에서 구한 해시를 그대로 사용
+        if digest is None:
+            digest = self.clipboard_fingerprint()
+        qimage = self.clipboard_fingerprint.image
+        if digest is None or digest == self.last_digest:
+            return
+        self.last_digest = digest
+
+        if self.is_internal_copy:
+            self.own_digests.add(digest)
+        if digest in self.own_digests:
+            return  # 마스킹 결과를 복사한 경우
+        if any(d == digest for d, _ in self.pending) or any(d == digest for d, _ in self.running.values()):
+            print("♻️ 이미 대기 중인 이미지 → 합침")
+            return
+
+        # 처리 중이어도 버리지 않고 대기열에 추가 (가득 차면 가장 오래 기다린 이미지를 건너뜀)
+        if len(self.pending) >= QUEUE_MAX_PENDING:
+            self.pending.popleft()
+            print("⚠️ 대기열이 가득 차서 가장 오래된 이미지를 건너뜀")
+        self.pending.append((digest, qimage))
+        self.start_jobs()
+
+    def start_jobs(self):
+        while self.pending and len(self.running) < QUEUE_WORKERS:
+            digest, qimage = self.pending.popleft()
+            seq = self.next_seq
+            self.next_seq += 1
 
             # 고유한 파일명 생성
             timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            os.makedirs("masked_images", exist_ok=True)
-            save_path = f"masked_images/code_{timestamp}.png"
+            if SAVE_RESULTS:
+                os.makedirs("masked_images", exist_ok=True)
+            save_path = f"masked_images/code_{timestamp}_{seq}.png"
             print(f"✅ 서버 요청 준비 완료: {save_path}")
 
+            # 서버 요청 쓰레드 실행
+            worker = MaskingWorker(self.server_url, qimage, save_path, seq)
+            worker.finished.connect(lambda seq, masked, preview: self.finish_job(seq, (masked, preview), None))
+            worker.error.connect(lambda seq, message: self.finish_job(seq, None, message))
+            self.running[seq] = (digest, worker)
+            worker.start()
+
+        if self.running:
             # 창을 최상단에 띄우기
             self.setWindowFlags(self.windowFlags() | Qt.WindowStaysOnTopHint)
             self.show()
@@ -123,64 +177,56 @@ class ImageMaskingApp(QWidget):
 
             # UI 업데이트
             # TODO: 기획에 따라 로딩 UI 삽입
+            self.update_status()
             self.masked_image_label.setText("⏳ 서버로 이미지 전송 중...")
             self.copy_button.setEnabled(False)
 
-            # 서버 요청 쓰레드 실행
-            self.is_processing = True
-            self.worker = MaskingWorker(
-                self.server_url,
-                img_data,
-                save_path
-            )
-            self.worker.finished.connect(self.update_masked_image)
-            self.worker.error.connect(self.show_error)
-            self.worker.start()
-
-    def qimage_to_bytes(self, qimage):
-        from PyQt5.QtCore import QBuffer, QByteArray
-        buffer = QBuffer()
-        buffer.open(QBuffer.ReadWrite)
-        qimage.save(buffer, "PNG")
-        return buffer.data()
-
-    def update_masked_image(self, path):
-        pixmap = QPixmap(path)
-        if not pixmap.isNull():
-            self.masked_image_label.setPixmap(
-                pixmap.scaled(500, 400, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            )
-            self.copy_button.setEnabled(True)
-        else:
-            self.masked_image_label.setText("❌ 이미지 로딩 실패")
-            self.copy_button.setEnabled(False)
+    def finish_job(self, seq, images, message):
+        _, worker = self.running.pop(seq)
+        worker.wait()
+        self.results[seq] = (images, message)
+
+        # 먼저 복사한 이미지부터 순서대로 표시
+        while self.next_display in self.results:
+            images, message = self.results.pop(self.next_display)
+            self.next_display += 1
+            if message:
+                self.show_error(message)
+            else:
+                self.update_masked_image(*images)
 
-        self.setWindowFlags(self.windowFlags() & ~Qt.WindowStaysOnTopHint)
-        self.show()
-        self.is_processing = False
+        self.start_jobs()
+        self.update_status()
+        if not self.running:
+            self.setWindowFlags(self.windowFlags() & ~Qt.WindowStaysOnTopHint)
+            self.show()
 
-        # 서버 응답 직후 내부 복사 방지 플래그 설정
-        self.is_internal_copy = True
-        QTimer.singleShot(interrupt_delay, self.reset_internal_copy)
+    def update_status(self):
+        waiting = len(self.pending) + len(self.running)
+        if waiting:
+            self.status_label.setText(f"⏳ 마스킹 중... (남은 이미지 {waiting}개)")
+        else:
+            self.status_label.setText("👀 이미지 클립보드 감시 중...")
 
-    def reset_internal_copy(self):
-        self.is_internal_copy = False
+    def update_masked_image(self, masked, preview):
+        # 디코딩/축소는 워커에서 끝났으므로 여기서는 표시만
+        self.masked_image = masked
+        self.masked_image_label.setPixmap(QPixmap.fromImage(preview))
+        self.copy_button.setEnabled(True)
 
     def show_error(self, message):
-        QMessageBox.critical(self, "에러", message)
-        self.masked_image_label.setText("❌ 서버 요청 실패")
+        print(message)
+        self.masked_image_label.setText(f"❌ 서버 요청 실패\n{message}")
         self.copy_button.setEnabled(False)
-        self.is_processing = False
-
-        self.setWindowFlags(self.windowFlags() & ~Qt.WindowStaysOnTopHint)
-        self.show()
 
     def copy_image_to_clipboard(self):
         clipboard = QApplication.clipboard()
-        pixmap = self.masked_image_label.pixmap()
-        if pixmap:
-            clipboard.setPixmap(pixmap)
-            self.last_clip = clipboard.pixmap() 
+        if self.masked_image is not None:
+            self.is_internal_copy = True
+            clipboard.setImage(self.masked_image)
+            self.is_internal_copy = False
+            self.last_digest = self.clipboard_fingerprint()
+            self.own_digests.add(self.last_digest)
             QMessageBox.information(self, "성공", "마스킹 이미지를 클립보드에 복사했습니다.")
         else:
             QMessageBox.warning(self, "오류", "❌ 복사할 이미지가 없습니다.")
@@ -0,0 +1,116 @@
+import io
+import os
+
+# 업로드 전 이미지 전처리 (축소, 포맷/품질 변경, 알파 채널 제거)
+# 서버는 줄인 이미지를 마스킹하고, 결과에서 바뀐 영역만 원본 해상도 이미지에 다시 입힘
+MAX_DIM = int(os.getenv("IMG_UPLOAD_MAX_DIM", "3000"))  # 0 이면 축소 안 함
+UPLOAD_FORMAT = os.getenv("IMG_UPLOAD_FORMAT", "auto")  # auto / png / jpeg / webp
+UPLOAD_QUALITY = int(os.getenv("IMG_UPLOAD_QUALITY", "90"))
+STRIP_ALPHA = os.getenv("IMG_STRIP_ALPHA", "1") == "1"
+# 마스킹으로 바뀐 픽셀로 볼 최소 차이 (재인코딩 노이즈 무시)
+DIFF_THRESHOLD = int(os.getenv("IMG_DIFF_THRESHOLD", "24"))
+
+MIME_TYPES = {"PNG": "image/png", "JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+def load_image(img_bytes):
+    from PIL import Image, ImageOps
+    image = Image.open(io.BytesIO(img_bytes))
+    source_format = image.format
+    image = ImageOps.exif_transpose(image)  # 카메라 사진 회전 정보 반영
+    image.load()
+    return image, source_format
+
+def encode_image(image, fmt, quality=UPLOAD_QUALITY):
+    buffer = io.BytesIO()
+    if fmt == "PNG":
+        image.save(buffer, "PNG", optimize=False, compress_level=6)
+    else:
+        image.save(buffer, fmt, quality=quality)
+    return buffer.getvalue()
+
+def upload_format(source_format):
+    if UPLOAD_FORMAT != "auto":
+        return UPLOAD_FORMAT.upper()
+    # 스크린샷(PNG 등)은 글자가 뭉개지지 않도록 무손실 유지, 사진(JPEG)은 JPEG 유지
+    return "JPEG" if source_format == "JPEG" else "PNG"
+
+def prepare_upload(img_bytes):
+    # (업로드 바이트, mime, 복원용 context). 바꿀 게 없으면 context 는 None 이고 원본 그대로 전송
+    from PIL import Image
+    try:
+        original, source_format = load_image(img_bytes)
+    except Exception:
+        return img_bytes, None, None
+
+    fmt = upload_format(source_format)
+    image = original
+    if STRIP_ALPHA or fmt == "JPEG":
+        if image.mode in ("RGBA", "LA", "P"):
+            rgba = image.convert("RGBA")
+            background = Image.new("RGB", rgba.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+
+    scale = 1.0
+    if MAX_DIM and max(image.size) > MAX_DIM:
+        scale = MAX_DIM / max(image.size)
+        image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))), Image.LANCZOS)
+
+    if scale == 1.0 and image is original and fmt == source_format:
+        return img_bytes, MIME_TYPES.get(fmt, "image/png"), None
+
+    upload_bytes = encode_image(image, fmt)
+    if scale == 1.0 and len(upload_bytes) >= len(img_bytes) and fmt == source_format:
+        return img_bytes, MIME_TYPES.get(fmt, "image/png"), None
+
+    # 서버가 실제로 본 이미지(인코딩 손실 포함)를 기준으로 차이를 계산해야 함
+    sent, _ = load_image(upload_bytes)
+    context = {"original": original, "sent": sent, "scale": scale, "format": source_format or "PNG"}
+    return upload_bytes, MIME_TYPES.get(fmt, "image/png"), context
+
+def changed_region_mask(sent, masked, threshold=DIFF_THRESHOLD):
+    # 서버가 바꾼 픽셀 = 255 인 L 모드 마스크 (경계가 빠지지 않도록 조금 넓힘)
+    # 밝기(L)로 바꾸면 파란색 위주 변화가 임계값 아래로 떨어지므로 채널별 차이의 최댓값을 씀
+    from PIL import ImageChops, ImageFilter
+    if masked.size != sent.size:
+        masked = masked.resize(sent.size)
+    r, g, b = ImageChops.difference(sent.convert("RGB"), masked.convert("RGB")).split()
+    diff = ImageChops.lighter(ImageChops.lighter(r, g), b)
+    mask = diff.point(lambda v: 255 if v > threshold else 0)
+    return mask.filter(ImageFilter.MaxFilter(5))
+
+def composite_changes(base, sent, masked, box=None):
+    # masked 에서 sent 와 달라진 영역만 base 의 box 위치(기본: 전체)에 덮어씀
+    from PIL import Image, ImageFilter
+    if box is None:
+        box = (0, 0, base.width, base.height)
+    size = (box[2] - box[0], box[3] - box[1])
+    mask = changed_region_mask(sent, masked)
+    if mask.size != size:
+        mask = mask.resize(size, Image.NEAREST).filter(ImageFilter.MaxFilter(3))
+    patch = masked.convert(base.mode)
+    if patch.size != size:
+        patch = patch.resize(size, Image.BICUBIC)
+    base.paste(patch, box[:2], mask)
+    return base
+
+def restore_result(result_bytes, context):
+    # 마스킹 결과를 원본 해상도 이미지에 반영해서 원본 포맷 바이트로 반환
+    if context is None:
+        return result_bytes
+    masked, _ = load_image(result_bytes)
+    original = context["original"]
+    if context["scale"] == 1.0 and masked.size == original.size:
+        # 축소하지 않았으면 서버 결과가 곧 원본 해상도 결과. 알파 채널만 다시 붙임
+        result = masked
+        if original.mode in ("RGBA", "LA") or (original.mode == "P" and "transparency" in original.info):
+            result = masked.convert("RGBA")
+            result.putalpha(original.convert("RGBA").getchannel("A"))
+    else:
+        if original.mode not in ("RGB", "RGBA", "L"):
+            original = original.convert("RGBA")
+        result = composite_changes(original.copy(), context["sent"], masked)
+    fmt = context["format"] if context["format"] in MIME_TYPES else "PNG"
+    return encode_image(result, fmt, quality=95)
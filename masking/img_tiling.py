@@ -0,0 +1,64 @@
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from masking import img_preprocess
+except ImportError:  # masking 폴더의 스크립트로 실행된 경우
+    import img_preprocess
+
+# 아주 큰 이미지(긴 전체 페이지 캡처, 스캔본)는 겹치는 타일로 나눠 동시에 마스킹한 뒤 합침
+# 타일마다 "바뀐 픽셀"만 원본에 덮어쓰므로 겹친 영역의 마스크는 양쪽 모두 유지됨
+TILE_TRIGGER = int(os.getenv("IMG_TILE_TRIGGER", "4000"))  # 가로/세로 중 하나라도 넘으면 타일 처리
+TILE_SIZE = int(os.getenv("IMG_TILE_SIZE", "2048"))
+TILE_OVERLAP = int(os.getenv("IMG_TILE_OVERLAP", "256"))  # 경계에 걸친 글자/얼굴이 한 타일엔 온전히 들어가도록
+TILE_WORKERS = int(os.getenv("IMG_TILE_WORKERS", "4"))
+
+def image_size(img_bytes):
+    from PIL import Image
+    try:
+        with Image.open(io.BytesIO(img_bytes)) as image:
+            return image.size  # 헤더만 읽음
+    except Exception:
+        return None
+
+def needs_tiling(img_bytes):
+    size = image_size(img_bytes)
+    return size is not None and TILE_TRIGGER > 0 and max(size) > TILE_TRIGGER
+
+def axis_starts(length, tile, overlap):
+    if length <= tile:
+        return [0]
+    step = max(1, tile - overlap)
+    starts = list(range(0, length - tile, step))
+    starts.append(length - tile)  # 마지막 타일은 끝에 맞춤
+    return starts
+
+def tile_boxes(width, height, tile=TILE_SIZE, overlap=TILE_OVERLAP):
+    return [
+        (x, y, min(x + tile, width), min(y + tile, height))
+        for y in axis_starts(height, tile, overlap)
+        for x in axis_starts(width, tile, overlap)
+    ]
+
+def mask_tiled(img_bytes, mask_tile, workers=TILE_WORKERS):
+    # mask_tile(PNG 바이트) -> 마스킹된 타일 바이트
+    original, source_format = img_preprocess.load_image(img_bytes)
+    if original.mode not in ("RGB", "RGBA", "L"):
+        original = original.convert("RGBA")
+    boxes = tile_boxes(original.width, original.height)
+    print(f"🧩 타일 {len(boxes)}개로 분할 ({original.width}x{original.height})")
+
+    def run(box):
+        tile = original.crop(box)
+        masked_bytes = mask_tile(img_preprocess.encode_image(tile, "PNG"))
+        masked, _ = img_preprocess.load_image(masked_bytes)
+        return tile, masked
+
+    result = original.copy()
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(boxes)))) as pool:
+        for box, (tile, masked) in zip(boxes, pool.map(run, boxes)):
+            img_preprocess.composite_changes(result, tile, masked, box)
+
+    fmt = source_format if source_format in img_preprocess.MIME_TYPES else "PNG"
+    return img_preprocess.encode_image(result, fmt, quality=95)
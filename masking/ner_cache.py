@@ -0,0 +1,106 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+# 텍스트 해시 -> NER 결과 캐시 (LRU + TTL, 선택적으로 디스크 저장)
+# 디스크 파일에는 개인정보 원문이 들어 있으므로 본인만 읽기 가능(0600)으로 저장하고,
+# 같은 파일을 쓰는 다른 프로세스의 항목을 지우지 않도록 저장할 때 디스크 내용과 합침
+class NerCache:
+    def __init__(self, max_entries=512, ttl=24 * 60 * 60, path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.entries = OrderedDict()  # key -> (저장 시각, ner_result)
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        if path:
+            self.load()
+
+    @staticmethod
+    def key(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, text):
+        key = self.key(text)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and time.time() - entry[0] > self.ttl:
+                del self.entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, text, ner_result):
+        self.put_many([(text, ner_result)])
+
+    def put_many(self, items):
+        # 여러 항목을 넣고 디스크 저장은 한 번만
+        now = time.time()
+        with self.lock:
+            for text, ner_result in items:
+                key = self.key(text)
+                self.entries[key] = (now, ner_result)
+                self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            if self.path:
+                self.save()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def read_disk(self):
+        if not os.path.exists(self.path):
+            return []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ NER 캐시 로드 실패: {e}")
+            return []
+
+    def merge(self, data):
+        # 메모리에 없거나 더 최근인 디스크 항목만 반영. 메모리에 없던 항목은 오래된 쪽(앞)에 둠
+        now = time.time()
+        older = OrderedDict()
+        for key, saved_at, ner_result in data:
+            if now - saved_at > self.ttl:
+                continue
+            current = self.entries.get(key)
+            if current is None:
+                older[key] = (saved_at, ner_result)
+            elif saved_at > current[0]:
+                self.entries[key] = (saved_at, ner_result)
+        older.update(self.entries)
+        self.entries = older
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def load(self):
+        self.merge(self.read_disk())
+
+    def save(self):
+        # 다른 프로세스가 그사이 저장한 항목과 합친 뒤, 임시 파일에 쓰고 교체 (중간에 종료돼도 기존 파일 유지)
+        self.merge(self.read_disk())
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        data = [[key, saved_at, ner_result] for key, (saved_at, ner_result) in self.entries.items()]
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        if os.name == "posix":
+            os.chmod(tmp_path, 0o600)  # 이전 실행이 남긴 임시 파일이어도 권한을 맞춤
+        os.replace(tmp_path, self.path)
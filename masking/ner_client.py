@@ -0,0 +1,48 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import http_client
+from ner_segments import split_segments
+
+# 긴 텍스트는 문장 경계에서 나눠 동시에 요청하고 결과를 순서대로 이어붙임
+MAX_CHUNK_CHARS = int(os.getenv("NER_MAX_CHUNK_CHARS", "4000"))
+MAX_WORKERS = int(os.getenv("NER_MAX_WORKERS", "4"))
+
+def split_chunks(text, max_chars=MAX_CHUNK_CHARS):
+    chunks = []
+    start = end = None
+    for seg_start, seg in split_segments(text):
+        seg_end = seg_start + len(seg)
+        if start is not None and seg_end - start > max_chars:
+            chunks.append(text[start:end])
+            start = None
+        if start is None:
+            start = seg_start
+        end = seg_end
+        # 한 문장이 상한보다 길면 공백 기준으로 강제 분할
+        while end - start > max_chars:
+            cut = text.rfind(" ", start + 1, start + max_chars)
+            if cut == -1:
+                cut = start + max_chars
+            chunks.append(text[start:cut])
+            start = cut
+    if start is not None:
+        chunks.append(text[start:end])
+    return [chunk for chunk in chunks if chunk.strip()]
+
+def post_ner(text, url=None):
+    response = http_client.post("ner", url=url, json={"text": text})
+    response.raise_for_status()
+    data = response.json()
+    if "ner_result" not in data:
+        raise ValueError("ner_result 없음")
+    return data["ner_result"]
+
+def request_ner(text, url=None, max_chars=MAX_CHUNK_CHARS, max_workers=MAX_WORKERS):
+    chunks = split_chunks(text, max_chars)
+    if len(chunks) <= 1:
+        return post_ner(chunks[0], url) if chunks else []
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+        results = pool.map(lambda chunk: post_ner(chunk, url), chunks)
+        return [token for chunk_result in results for token in chunk_result]
@@ -0,0 +1,31 @@
+import re
+
+# 줄바꿈 또는 문장 끝(. ! ? 。 뒤 공백)에서 분할
+SENTENCE_BOUNDARY = re.compile(r'\n+|(?<=[.!?。])\s+')
+
+def split_segments(text):
+    # (시작 위치, 문장) 목록. 구분자는 버리고 위치로 원문과 연결
+    segments = []
+    pos = 0
+    for m in SENTENCE_BOUNDARY.finditer(text):
+        if m.start() > pos:
+            segments.append((pos, text[pos:m.start()]))
+        pos = m.end()
+    if pos < len(text):
+        segments.append((pos, text[pos:]))
+    return segments
+
+def split_tokens_by_segment(ner_result, text, bounds):
+    # 여러 문장을 합쳐 보낸 NER 결과를 단어 위치 기준으로 문장별로 되돌림
+    # bounds: 합친 text 안에서 각 문장의 (시작, 끝)
+    per_segment = [[] for _ in bounds]
+    cursor = 0
+    index = 0
+    for word, tag in ner_result:
+        found = text.find(word, cursor) if word else -1
+        if found != -1:
+            cursor = found + len(word)
+            while index < len(bounds) - 1 and found >= bounds[index][1]:
+                index += 1
+        per_segment[index].append([word, tag])
+    return per_segment
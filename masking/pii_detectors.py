@@ -0,0 +1,107 @@
+import re
+from functools import lru_cache
+
+# 정규식 기반 개인정보 탐지기 레지스트리
+# 태그 -> (패턴, 검증 함수). 등록 순서가 곧 우선순위 (같은 위치에서 먼저 등록된 탐지기가 이김)
+DETECTORS = {}
+
+# 2020.10 이후 발급된 주민등록번호는 뒷자리가 임의 번호라 검증번호가 맞지 않을 수 있음
+# → 기본은 생년월일 자리만 확인하고, True 로 바꾸면 검증번호까지 확인
+RRN_STRICT_CHECKSUM = False
+
+def register_detector(tag, pattern, validator=None):
+    DETECTORS[tag] = (pattern, validator)
+    compile_scanner.cache_clear()
+    compile_detector.cache_clear()
+
+def luhn_ok(digits):
+    total = 0
+    for i, ch in enumerate(reversed(digits)):
+        d = int(ch)
+        if i % 2 == 1:
+            d *= 2
+            if d > 9:
+                d -= 9
+        total += d
+    return total % 10 == 0
+
+def rrn_checksum_ok(digits):
+    weights = (2, 3, 4, 5, 6, 7, 8, 9, 2, 3, 4, 5)
+    total = sum(int(d) * w for d, w in zip(digits, weights))
+    return (11 - total % 11) % 10 == int(digits[12])
+
+def validate_rrn(value):
+    digits = value.replace("-", "")
+    month, day = int(digits[2:4]), int(digits[4:6])
+    if not (1 <= month <= 12 and 1 <= day <= 31):
+        return False
+    if RRN_STRICT_CHECKSUM and not rrn_checksum_ok(digits):
+        return False
+    return True
+
+def validate_card(value):
+    digits = re.sub(r"\D", "", value)
+    return 13 <= len(digits) <= 16 and luhn_ok(digits)
+
+# 계좌번호 패턴에 걸리지만 계좌가 아닌 모양 (휴대폰/지역번호 전화, 사업자등록번호)
+NON_ACCOUNT_PATTERN = re.compile(r"01[016789]-\d{3,4}-\d{4}|0\d{1,2}-\d{3,4}-\d{4}|\d{3}-\d{2}-\d{5}")
+
+def validate_account(value):
+    # 날짜(2024-01-01) 같은 짧은 숫자열은 제외
+    if not 10 <= sum(ch.isdigit() for ch in value) <= 14:
+        return False
+    return NON_ACCOUNT_PATTERN.fullmatch(value) is None
+
+@lru_cache(maxsize=None)
+def compile_detector(tag):
+    return re.compile(DETECTORS[tag][0])
+
+@lru_cache(maxsize=32)
+def compile_scanner(tags):
+    # 선택된 태그만 하나의 정규식(이름 있는 그룹 alternation)으로 묶어 한 번에 스캔
+    parts = [f"(?P<{tag}>{pattern})" for tag, (pattern, _) in DETECTORS.items() if tag in tags]
+    if not parts:
+        return None
+    return re.compile("|".join(parts))
+
+def is_valid(tag, value):
+    validator = DETECTORS[tag][1]
+    return validator is None or validator(value)
+
+def scan_pii(text, mask_tags, priority_base=1):
+    # alternation 이 먼저 잡은 매치가 검증에 실패하면 같은 위치에서 나머지 탐지기를 우선순위 순서로 다시 시도하고,
+    # 그래도 없으면 한 글자 뒤부터 다시 스캔 (검증에 실패한 구간이 다른 탐지기를 가리지 않도록)
+    tags = frozenset(mask_tags)
+    scanner = compile_scanner(tags)
+    if scanner is None:
+        return []
+    order = {tag: i for i, tag in enumerate(DETECTORS)}
+    spans = []
+    pos = 0
+    while True:
+        m = scanner.search(text, pos)
+        if m is None:
+            break
+        hit = (m.lastgroup, m) if is_valid(m.lastgroup, m.group()) else None
+        if hit is None:
+            for tag in DETECTORS:
+                if tag not in tags or tag == m.lastgroup:
+                    continue
+                other = compile_detector(tag).match(text, m.start())
+                if other and is_valid(tag, other.group()):
+                    hit = (tag, other)
+                    break
+        if hit is None:
+            pos = m.start() + 1
+            continue
+        tag, match = hit
+        spans.append((match.start(), match.end(), tag, priority_base + order[tag]))
+        pos = max(match.end(), match.start() + 1)
+    return spans
+
+register_detector("EMAIL", r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+")
+register_detector("PHONE", r"(?<!\d)01[016789]-\d{3,4}-\d{4}(?!\d)")
+register_detector("SSN", r"(?<!\d)\d{6}-\d{7}(?!\d)", validate_rrn)
+register_detector("CARD", r"(?<!\d)\d{4}[- ]?\d{4}[- ]?\d{4}[- ]?\d{1,4}(?!\d)", validate_card)
+register_detector("ACCOUNT", r"(?<![-\d])\d{2,6}-\d{2,6}-\d{2,6}(?:-\d{1,3})?(?![-\d])", validate_account)
+register_detector("PASSPORT", r"(?<![A-Za-z0-9])[MSRGD](?:\d{8}|\d{3}[A-Z]\d{4})(?![A-Za-z0-9])")
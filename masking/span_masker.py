@@ -0,0 +1,112 @@
+import re
+from collections import deque
+
+# 여러 단어를 한 번에 찾는 Aho-Corasick 오토마톤
+# 텍스트 길이 n, 전체 매치 수 z 에 대해 O(n + z)
+class WordMatcher:
+    def __init__(self, words):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]  # 각 노드에서 끝나는 단어 인덱스
+        self.words = []
+
+        for word in dict.fromkeys(words):
+            if not word:
+                continue
+            self._add(word)
+        self._build()
+
+    def _add(self, word):
+        node = 0
+        for ch in word:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            node = nxt
+        self.out[node].append(len(self.words))
+        self.words.append(word)
+
+    def _build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                cand = self.goto[f].get(ch, 0)
+                self.fail[nxt] = cand if cand != nxt else 0
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def finditer(self, text):
+        # (start, end, word) 를 끝 위치 순서로 반환
+        if not self.words:
+            return
+        node = 0
+        goto, fail, out, words = self.goto, self.fail, self.out, self.words
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for idx in out[node]:
+                word = words[idx]
+                yield i + 1 - len(word), i + 1, word
+
+def find_word_spans(text, word_tags, priority=0):
+    # word_tags: {단어: 태그}
+    matcher = WordMatcher(word_tags.keys())
+    return [(start, end, word_tags[word], priority) for start, end, word in matcher.finditer(text)]
+
+def resolve_overlaps(spans):
+    # 겹치는 구간 정리 규칙 (결정적):
+    # 1) 먼저 시작하는 구간 우선, 2) 같은 위치면 더 긴 구간 우선, 3) 그래도 같으면 priority 값이 작은 쪽 우선
+    ordered = sorted(spans, key=lambda s: (s[0], s[0] - s[1], s[3]))
+    kept = []
+    last_end = 0
+    for span in ordered:
+        if span[0] >= last_end:
+            kept.append(span)
+            last_end = span[1]
+    return kept
+
+def apply_spans(text, spans, render):
+    # 정리된 구간을 한 번의 순회로 치환
+    parts = []
+    pos = 0
+    for start, end, tag, _ in spans:
+        parts.append(text[pos:start])
+        parts.append(render(tag, text[start:end]))
+        pos = end
+    parts.append(text[pos:])
+    return "".join(parts)
+
+# 마스킹 토큰 형식 [TAG_uid]
+TOKEN_PATTERN = re.compile(r'\[([A-Z]+)_([a-f0-9]{8})\]')
+
+def restore_tokens(text, lookup, restore_tags=None):
+    # lookup: uid 목록 -> {uid: (태그, 원문)}
+    # restore_tags 가 주어지면 해당 태그만 복원하고 나머지는 마스킹 유지
+    matches = list(TOKEN_PATTERN.finditer(text))
+    if not matches:
+        return text
+    entries = lookup([m.group(2) for m in matches])
+
+    parts = []
+    pos = 0
+    for m in matches:
+        tag, uid = m.group(1), m.group(2)
+        entry = entries.get(uid)
+        if entry is None or entry[0] != tag:
+            continue
+        if restore_tags is not None and tag not in restore_tags:
+            continue
+        parts.append(text[pos:m.start()])
+        parts.append(entry[1])
+        pos = m.end()
+    parts.append(text[pos:])
+    return "".join(parts)
@@ -0,0 +1,138 @@
+import os
+import threading
+
+import numpy as np
+
+try:
+    from masking import http_client
+except ImportError:  # masking 폴더의 스크립트로 실행된 경우
+    import http_client
+
+# 음성 인식 엔진 선택 (STT_BACKEND 또는 --stt-backend)
+# - google: Google Cloud Speech (기본)
+# - whisper: faster-whisper 로 프로세스 안에서 오프라인 인식 (네트워크 불필요)
+# - http: 로컬/사내 STT 서버. stt_stub_server.py 로 지연 시간을 흉내 내서 파이프라인 처리량 측정 가능
+# 모든 엔진은 transcribe(LINEAR16 바이트, 샘플레이트, 채널 수, word_times) -> (텍스트, 단어 목록), 여러 스레드에서 동시에 호출됨
+# 단어 목록은 word_times=True 일 때만 채워지며 [(단어, 시작 초, 끝 초)] (조각 시작 기준)
+LANGUAGE = os.getenv("STT_LANGUAGE", "ko-KR")
+
+class GoogleBackend:
+    name = "google"
+
+    def __init__(self, language=LANGUAGE):
+        self.language = language
+        self._client = None
+        self._lock = threading.Lock()
+
+    def config(self, sample_rate, channels, word_times=False):
+        return {"engine": self.name, "language": self.language, "sample_rate": sample_rate, "channels": channels,
+                "word_times": word_times}
+
+    def client(self):
+        # 클라이언트 생성(인증, gRPC 채널)은 처음 쓸 때 한 번만. SpeechClient 는 여러 스레드에서 같이 써도 됨
+        with self._lock:
+            if self._client is None:
+                from google.cloud import speech
+                os.environ.setdefault(
+                    "GOOGLE_APPLICATION_CREDENTIALS",
+                    os.getenv("GOOGLE_STT_CREDENTIALS", "capstone2-461808-885e4052d835.json"),
+                )
+                self._client = speech.SpeechClient()
+            return self._client
+
+    def transcribe(self, pcm, sample_rate, channels=1, word_times=False):
+        from google.cloud import speech
+        client = self.client()
+        audio = speech.RecognitionAudio(content=pcm)
+        config = speech.RecognitionConfig(
+            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+            sample_rate_hertz=sample_rate,
+            audio_channel_count=channels,
+            language_code=self.language,
+            enable_word_time_offsets=word_times,
+        )
+        response = client.recognize(config=config, audio=audio)
+        alternatives = [result.alternatives[0] for result in response.results if result.alternatives]
+        words = [
+            (w.word, w.start_time.total_seconds(), w.end_time.total_seconds())
+            for alternative in alternatives for w in alternative.words
+        ]
+        return " ".join(alternative.transcript for alternative in alternatives), words
+
+def to_float_mono_16k(pcm, sample_rate, channels):
+    # whisper 입력 형식 (16kHz 모노 float32). ffmpeg 입력은 이미 16kHz 모노라 변환 없음
+    samples = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+    if channels > 1:
+        samples = samples[: len(samples) // channels * channels].reshape(-1, channels).mean(axis=1)
+    if sample_rate != 16000 and len(samples):
+        target = np.arange(0, len(samples) * 16000 // sample_rate) * (sample_rate / 16000)
+        samples = np.interp(target, np.arange(len(samples)), samples).astype(np.float32)
+    return samples
+
+class WhisperBackend:
+    name = "whisper"
+
+    def __init__(self, language=LANGUAGE):
+        self.language = language.split("-")[0]
+        self.model_name = os.getenv("STT_WHISPER_MODEL", "small")
+        self.device = os.getenv("STT_WHISPER_DEVICE", "cpu")
+        self.compute_type = os.getenv("STT_WHISPER_COMPUTE_TYPE", "int8")
+        self._model = None
+        self._lock = threading.Lock()
+
+    def config(self, sample_rate, channels, word_times=False):
+        return {"engine": self.name, "model": self.model_name, "language": self.language,
+                "sample_rate": sample_rate, "channels": channels, "word_times": word_times}
+
+    def model(self):
+        with self._lock:
+            if self._model is None:
+                try:
+                    from faster_whisper import WhisperModel
+                except ImportError as e:
+                    raise RuntimeError("STT_BACKEND=whisper 는 faster-whisper 패키지가 필요합니다 (pip install faster-whisper)") from e
+                self._model = WhisperModel(self.model_name, device=self.device, compute_type=self.compute_type,
+                                           cpu_threads=int(os.getenv("STT_WHISPER_THREADS", "0")))
+            return self._model
+
+    def transcribe(self, pcm, sample_rate, channels=1, word_times=False):
+        segments, _ = self.model().transcribe(to_float_mono_16k(pcm, sample_rate, channels),
+                                              language=self.language, vad_filter=False, word_timestamps=word_times)
+        segments = list(segments)  # 결과는 지연 생성이라 여기서 실제로 인식됨
+        words = [(w.word.strip(), w.start, w.end) for segment in segments for w in (segment.words or [])]
+        return " ".join(segment.text.strip() for segment in segments), words
+
+class HttpBackend:
+    # POST 본문: LINEAR16 바이트, 응답: {"transcript": "...", "words": [{"word", "start", "end"}]}
+    name = "http"
+
+    def __init__(self, language=LANGUAGE, url=None):
+        self.language = language
+        self.url = url or http_client.endpoint_url("stt")
+
+    def config(self, sample_rate, channels, word_times=False):
+        return {"engine": self.name, "url": self.url, "language": self.language,
+                "sample_rate": sample_rate, "channels": channels, "word_times": word_times}
+
+    def transcribe(self, pcm, sample_rate, channels=1, word_times=False):
+        response = http_client.post(
+            "stt", url=self.url, data=pcm,
+            params={"rate": sample_rate, "channels": channels, "language": self.language, "word_times": int(word_times)},
+            headers={"Content-Type": f"audio/L16; rate={sample_rate}; channels={channels}"},
+        )
+        response.raise_for_status()
+        data = response.json()
+        words = [(w["word"], w["start"], w["end"]) for w in data.get("words", [])]
+        return data["transcript"], words
+
+BACKENDS = {
+    "google": GoogleBackend,
+    "whisper": WhisperBackend,
+    "http": HttpBackend,
+}
+
+def get_backend(name=None):
+    name = name or os.getenv("STT_BACKEND", "google")
+    if name not in BACKENDS:
+        raise ValueError(f"알 수 없는 STT_BACKEND: {name} (가능: {', '.join(BACKENDS)})")
+    return BACKENDS[name]()
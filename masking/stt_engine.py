@@ -0,0 +1,33 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# 조각들을 동시에 처리(음성 인식, NER)하고 결과는 조각 순서대로 돌려줌
+# 동시에 처리 중인 조각 수를 제한하므로 입력 조각을 미리 전부 읽어 두지 않음
+# iter_ordered 를 이어 붙이면 단계(STT → NER)끼리도 겹쳐서 진행됨
+
+def iter_ordered(items, func, max_in_flight=4):
+    # (순번, 결과, 오류) 를 순번 순서대로 생성. 실패한 항목은 결과 None, 오류에 예외
+    max_in_flight = max(1, max_in_flight)
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        in_flight = deque()
+        item_iter = iter(enumerate(items))
+
+        def submit_next():
+            item = next(item_iter, None)
+            if item is None:
+                return False
+            index, value = item
+            in_flight.append((index, pool.submit(func, value)))
+            return True
+
+        while len(in_flight) < max_in_flight and submit_next():
+            pass
+
+        while in_flight:
+            index, future = in_flight.popleft()
+            try:
+                result, error = future.result(), None
+            except Exception as e:
+                result, error = None, e
+            submit_next()
+            yield index, result, error
@@ -0,0 +1,64 @@
+import json
+import time
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# STT_BACKEND=http 용 로컬 STT 흉내 서버 (네트워크/클라우드 없이 파이프라인 처리량 측정용)
+# 응답 지연 = --latency + 오디오 길이(초) * --rtf, 응답 텍스트는 --text
+# word_times=1 이면 단어 시각은 조각 길이를 단어 수로 균등하게 나눠서 돌려줌
+# 예: python masking/stt_stub_server.py --latency 0.3 --rtf 0.1
+#     STT_BACKEND=http python masking/audio_masking.py --source sample.wav
+
+def make_handler(latency, rtf, text):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if urlparse(self.path).path != "/stt":
+                self.send_error(404)
+                return
+            params = parse_qs(urlparse(self.path).query)
+            rate = int(params.get("rate", ["16000"])[0])
+            channels = int(params.get("channels", ["1"])[0])
+            pcm = self.rfile.read(int(self.headers.get("Content-Length", "0")))
+            seconds = len(pcm) / (rate * channels * 2)
+            time.sleep(latency + seconds * rtf)
+
+            transcript = text.format(seconds=seconds)
+            result = {"transcript": transcript}
+            if params.get("word_times", ["0"])[0] == "1":
+                words = transcript.split()
+                step = seconds / max(len(words), 1)
+                result["words"] = [
+                    {"word": word, "start": round(i * step, 3), "end": round((i + 1) * step, 3)}
+                    for i, word in enumerate(words)
+                ]
+            body = json.dumps(result, ensure_ascii=False).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 STT 흉내 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="요청당 고정 지연 (초)")
+    parser.add_argument("--rtf", type=float, default=0.1, help="오디오 1초당 추가 지연 (초)")
+    parser.add_argument("--text", default="홍길동 고객님 전화번호는 010-1234-5678 입니다 ({seconds:.1f}초)", help="응답 텍스트")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args.latency, args.rtf, args.text))
+    print(f"🧪 STT 흉내 서버: http://{args.host}:{args.port}/stt (지연 {args.latency}s + {args.rtf}s/오디오초)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,16 @@
 import os
 import json
-import pyperclip
-import time
 import re
 import uuid
-import requests
 
-# TODO: 서버 주소 env 파일로 이동 필요 (img_masking 참고)
-NER_SERVER_URL = "http://ec2-43-203-236-115.ap-northeast-2.compute.amazonaws.com:8000/ner"
+import ner_client
+from clipboard_watcher import watch_text
+from span_masker import TOKEN_PATTERN, find_word_spans, resolve_overlaps, apply_spans, restore_tokens
+from pii_detectors import DETECTORS, scan_pii
+from ner_cache import NerCache
+from token_store import TokenStore
+from ner_segments import split_segments, split_tokens_by_segment
+
 # MASK_ENTITIES = {"PERSON", "DATE", "LOCATION", "ORGANIZATION", "TIME"}
 SELECTION_MASKING = {
     "이름": {"PERSON"},
@@ -17,21 +20,65 @@ SELECTION_MASKING = {
     "기관": {"ORGANIZATION"},
     "이메일": {"EMAIL"},
     "전화번호": {"PHONE"},
-    "주민등록번호": {"SSN"}
+    "주민등록번호": {"SSN"},
+    "카드번호": {"CARD"},
+    "계좌번호": {"ACCOUNT"},
+    "여권번호": {"PASSPORT"}
 }
-MASK_CACHE = {}
+# 토글로 프로세스가 재시작돼도 복원할 수 있도록 SQLite 파일에 저장
+MASK_CACHE = TokenStore(
+    path=os.getenv("MASK_CACHE_PATH", "mask_cache.db"),
+    max_entries=int(os.getenv("MASK_CACHE_MAX_ENTRIES", "100000")),
+    max_bytes=int(os.getenv("MASK_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    ttl=float(os.getenv("MASK_CACHE_TTL", str(7 * 24 * 60 * 60))),
+)
+# 부분 복원할 태그 (예: "DATE,TIME"). 비어 있으면 전부 복원
+UNMASK_TAGS = {tag.strip() for tag in os.getenv("UNMASK_TAGS", "").split(",") if tag.strip()} or None
+# 같은 문장 반복 복사 시 NER 서버 재요청 방지 (NER_CACHE_PATH 지정 시 디스크에도 저장)
+NER_CACHE = NerCache(max_entries=4096, path=os.getenv("NER_CACHE_PATH"))
+
+# 원격 NER 서버가 필요한 태그 (나머지는 pii_detectors 정규식으로 로컬 처리)
+NER_TAGS = {"PERSON", "DATE", "TIME", "LOCATION", "ORGANIZATION"}
+# 개체명이 들어갈 수 없는 부분 (URL, 이메일)
+NON_ENTITY_PATTERN = re.compile(r'(?:https?://|www\.)\S+|[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+')
 
 def generate_uid():
     return str(uuid.uuid4())[:8]
 
-def get_ner_result(text):
+def request_ner(text):
     try:
-        response = requests.post(NER_SERVER_URL, json={"text": text}, timeout=60)
-        response.raise_for_status()
-        return response.json()["ner_result"]
+        return ner_client.request_ner(text)
     except Exception as e:
         print(f"❌ 서버 요청 실패: {e}")
-        return []
+        return None
+
+def get_ner_result(text):
+    # 문장 단위로 캐시를 확인하고, 새로 생겼거나 바뀐 문장만 모아서 NER 요청
+    segments = [seg for _, seg in split_segments(text) if seg.strip()]
+    results = [NER_CACHE.get(seg) for seg in segments]
+    missing = [i for i, r in enumerate(results) if r is None]
+
+    if missing:
+        print(f"🔎 NER 요청: 변경된 문장 {len(missing)}/{len(segments)}개")
+        bounds = []
+        pos = 0
+        for i in missing:
+            bounds.append((pos, pos + len(segments[i])))
+            pos += len(segments[i]) + 1
+        batch_text = "\n".join(segments[i] for i in missing)
+
+        ner_result = request_ner(batch_text)
+        if ner_result is None:
+            per_segment = [[] for _ in missing]
+        else:
+            per_segment = split_tokens_by_segment(ner_result, batch_text, bounds)
+            NER_CACHE.put_many(zip((segments[i] for i in missing), per_segment))
+        for i, seg_result in zip(missing, per_segment):
+            results[i] = seg_result
+    else:
+        print(f"⚡ NER 캐시 적중 {NER_CACHE.stats()}")
+
+    return [token for seg_result in results for token in seg_result]
     
 def load_mask_tags_from_selection(file="selected_fields.json"):
     if not os.path.exists(file):
@@ -44,70 +91,60 @@ def load_mask_tags_from_selection(file="selected_fields.json"):
         mask_tags.update(SELECTION_MASKING.get(sel, set()))
     return mask_tags
 
+def needs_ner(text, mask_tags):
+    remote_tags = (mask_tags & NER_TAGS) - set(DETECTORS)
+    if not remote_tags:
+        return False  # 선택된 항목이 전부 로컬 탐지 가능
+
+    rest = NON_ENTITY_PATTERN.sub(" ", text)
+    if remote_tags & {"DATE", "TIME"}:
+        # 날짜/시간은 숫자만으로도 표현되므로 숫자가 남아 있으면 NER 필요
+        return any(ch.isalnum() for ch in rest)
+    return any(ch.isalpha() for ch in rest)
+
 def mask_text_with_cache(text):
     mask_tags = load_mask_tags_from_selection()
-    result = get_ner_result(text)
-    masked_text = text
+    result = get_ner_result(text) if needs_ner(text, mask_tags) else []
 
+    # NER 단어 + 정규식 탐지기 구간을 모아 한 번에 치환 (같은 단어는 같은 토큰)
+    word_tags = {}
     for word, tag in result:
-        if tag in mask_tags and word in masked_text:
-            uid = generate_uid()
-            MASK_CACHE[uid] = (tag, word)
-            masked_text = masked_text.replace(word, f"[{tag}_{uid}]")
-
-    if "EMAIL" in mask_tags:
-        for email in re.findall(r'[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+', masked_text):
-            uid = generate_uid()
-            MASK_CACHE[uid] = ("EMAIL", email)
-            masked_text = masked_text.replace(email, f"[EMAIL_{uid}]")
-
-    if "PHONE" in mask_tags:
-        for phone in re.findall(r'01[016789]-\d{3,4}-\d{4}', masked_text):
-            uid = generate_uid()
-            MASK_CACHE[uid] = ("PHONE", phone)
-            masked_text = masked_text.replace(phone, f"[PHONE_{uid}]")
-
-    if "SSN" in mask_tags:
-        for ssn in re.findall(r'\d{6}-\d{7}', masked_text):
-            uid = generate_uid()
-            MASK_CACHE[uid] = ("SSN", ssn)
-            masked_text = masked_text.replace(ssn, f"[SSN_{uid}]")
-
-    return masked_text
-
-def partial_unmask(text):
-    restored = text
-    pattern = re.compile(r'\[([A-Z]+)_([a-f0-9]{8})\]')
-    for tag, uid in pattern.findall(text):
-        if uid in MASK_CACHE and MASK_CACHE[uid][0] == tag:
-            word = MASK_CACHE[uid][1]
-            restored = restored.replace(f"[{tag}_{uid}]", word)
-    return restored
+        if tag in mask_tags and word:
+            word_tags.setdefault(word, tag)
+    spans = find_word_spans(text, word_tags, priority=0)
+
+    spans += scan_pii(text, mask_tags)
+
+    # 토큰을 텍스트에 쓰기 전에 저장소에 먼저 등록 (uid 충돌 시 저장소가 새 uid 발급)
+    spans = resolve_overlaps(spans)
+    values = list(dict.fromkeys((tag, text[start:end]) for start, end, tag, _ in spans))
+    uids = MASK_CACHE.add_many(values, generate_uid)
+    tokens = {value: f"[{value[0]}_{uid}]" for value, uid in zip(values, uids)}
+
+    return apply_spans(text, spans, lambda tag, word: tokens[(tag, word)])
+
+def partial_unmask(text, restore_tags=UNMASK_TAGS):
+    return restore_tokens(text, MASK_CACHE.get_many, restore_tags)
+
+def handle_clip(current_clip):
+    if not current_clip.strip():
+        return None
+
+    if TOKEN_PATTERN.search(current_clip):
+        restored = partial_unmask(current_clip)
+        print("\n♻️ 마스킹된 텍스트 감지 → 부분 복원")
+        print("✅ 복원 후 클립보드에 저장됨:\n", restored)
+        return restored
+
+    print("\n🔍 새 복사 감지!\n", current_clip)
+    masked = mask_text_with_cache(current_clip)
+    print("✅ 마스킹 후 클립보드에 저장됨:\n", masked)
+    return masked
 
 def main():
     print("📋 클립보드 감시 중... (Ctrl+C로 종료)")
-    last_clip = pyperclip.paste()
-
     try:
-        while True:
-            current_clip = pyperclip.paste()
-            if current_clip != last_clip:
-                if re.search(r'\[([A-Z]+)_([a-f0-9]{8})\]', current_clip):
-                    restored = partial_unmask(current_clip)
-                    pyperclip.copy(restored)
-                    print("\n♻️ 마스킹된 텍스트 감지 → 부분 복원")
-                    print("✅ 복원 후 클립보드에 저장됨:\n", restored)
-                    last_clip = restored
-                    continue
-
-                print("\n🔍 새 복사 감지!\n", current_clip)
-                masked = mask_text_with_cache(current_clip)
-                pyperclip.copy(masked)
-                print("✅ 마스킹 후 클립보드에 저장됨:\n", masked)
-                last_clip = masked
-
-            time.sleep(0.5)
-
+        watch_text(handle_clip)
     except Exception as e:
         print(f"❌ 예외 발생: {e}")
         input("Press Enter to exit...")
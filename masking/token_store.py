@@ -0,0 +1,152 @@
+import os
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# 마스킹 토큰(uid) -> (태그, 원문) 저장소
+# SQLite(WAL) 파일에 저장해서 프로세스 재시작 후에도 복원 가능하고, 여러 프로세스가 동시에 사용 가능
+# 개수 상한은 쓸 때마다 지킴. TTL/용량 상한은 200건 쓸 때마다 정리하므로 그 사이에는 조금 넘을 수 있음
+class TokenStore:
+    def __init__(self, path="mask_cache.db", max_entries=100000, max_bytes=64 * 1024 * 1024, ttl=7 * 24 * 60 * 60):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.writes_since_prune = 0
+
+        is_new = not os.path.exists(path)
+        self.conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        if is_new and os.name == "posix":
+            os.chmod(path, 0o600)  # 원문이 들어 있으므로 본인만 읽기 가능
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS tokens ("
+            "uid TEXT PRIMARY KEY, tag TEXT NOT NULL, word TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS tokens_last_used ON tokens(last_used)")
+        self.prune()
+
+    def get(self, uid, default=None):
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute("SELECT tag, word, last_used FROM tokens WHERE uid = ?", (uid,)).fetchone()
+            if row is None:
+                return default
+            if now - row[2] > self.ttl:
+                self.conn.execute("DELETE FROM tokens WHERE uid = ?", (uid,))
+                return default
+            self.conn.execute("UPDATE tokens SET last_used = ? WHERE uid = ?", (now, uid))
+            return row[0], row[1]
+
+    def get_many(self, uids):
+        # uid 목록을 한 번에 조회 → {uid: (태그, 원문)}
+        uids = list(dict.fromkeys(uids))
+        found = {}
+        now = time.time()
+        with self.lock:
+            for i in range(0, len(uids), 500):
+                batch = uids[i:i + 500]
+                marks = ",".join("?" * len(batch))
+                rows = self.conn.execute(
+                    f"SELECT uid, tag, word FROM tokens WHERE uid IN ({marks}) AND last_used >= ?",
+                    (*batch, now - self.ttl),
+                ).fetchall()
+                for uid, tag, word in rows:
+                    found[uid] = (tag, word)
+            if found:
+                self.conn.executemany("UPDATE tokens SET last_used = ? WHERE uid = ?", [(now, uid) for uid in found])
+        return found
+
+    def set_many(self, items):
+        # items: {uid: (태그, 원문)}. 이미 있는 uid 는 덮어씀 (새 토큰 발급은 add_many)
+        now = time.time()
+        rows = [(uid, tag, word, now) for uid, (tag, word) in items.items()]
+        if not rows:
+            return
+        with self.lock:
+            with self.transaction():
+                self.conn.executemany("INSERT OR REPLACE INTO tokens VALUES (?, ?, ?, ?)", rows)
+                self.enforce_max_entries()
+            self.writes_since_prune += len(rows)
+        if self.writes_since_prune >= 200:
+            self.prune()
+
+    def add_many(self, values, make_uid):
+        # values: [(태그, 원문)] → 같은 순서의 새 uid 목록
+        # uid 가 짧아(32bit) 저장된 토큰과 겹칠 수 있으므로, 겹치면 기존 항목을 덮지 않고 uid 를 다시 만듦
+        now = time.time()
+        uids = []
+        if not values:
+            return uids
+        with self.lock:
+            with self.transaction():
+                for tag, word in values:
+                    while True:
+                        uid = make_uid()
+                        cursor = self.conn.execute("INSERT OR IGNORE INTO tokens VALUES (?, ?, ?, ?)", (uid, tag, word, now))
+                        if cursor.rowcount == 1:
+                            break
+                    uids.append(uid)
+                self.enforce_max_entries()
+            self.writes_since_prune += len(values)
+        if self.writes_since_prune >= 200:
+            self.prune()
+        return uids
+
+    @contextmanager
+    def transaction(self):
+        # self.lock 을 잡은 상태에서 사용. 중간에 실패하면(잠김, 디스크 부족 등) 롤백해서
+        # 연결이 트랜잭션 안에 남아 이후 BEGIN 이 전부 실패하는 일이 없도록 함
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+            self.conn.execute("COMMIT")
+        except BaseException:
+            if self.conn.in_transaction:
+                self.conn.execute("ROLLBACK")
+            raise
+
+    def enforce_max_entries(self):
+        # 트랜잭션 안에서 호출. 개수 상한을 넘은 만큼 오래 안 쓴 항목부터 제거
+        count = self.conn.execute("SELECT COUNT(*) FROM tokens").fetchone()[0]
+        if count > self.max_entries:
+            self.conn.execute(
+                "DELETE FROM tokens WHERE uid IN (SELECT uid FROM tokens ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def prune(self):
+        # TTL 만료 → 개수 상한 → 용량 상한 순서로 오래 안 쓴 항목부터 제거
+        with self.lock:
+            self.writes_since_prune = 0
+            with self.transaction():
+                self.conn.execute("DELETE FROM tokens WHERE last_used < ?", (time.time() - self.ttl,))
+                count, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(word)), 0) FROM tokens").fetchone()
+                if count > self.max_entries:
+                    self.conn.execute(
+                        "DELETE FROM tokens WHERE uid IN (SELECT uid FROM tokens ORDER BY last_used LIMIT ?)",
+                        (count - self.max_entries,),
+                    )
+                if size > self.max_bytes:
+                    # 평균 길이로 지울 개수를 추정
+                    avg = size / max(count, 1)
+                    excess = int((size - self.max_bytes) / max(avg, 1)) + 1
+                    self.conn.execute(
+                        "DELETE FROM tokens WHERE uid IN (SELECT uid FROM tokens ORDER BY last_used LIMIT ?)",
+                        (excess,),
+                    )
+
+    def __setitem__(self, uid, value):
+        self.set_many({uid: value})
+
+    def __getitem__(self, uid):
+        value = self.get(uid)
+        if value is None:
+            raise KeyError(uid)
+        return value
+
+    def __contains__(self, uid):
+        return self.get(uid) is not None
@@ -0,0 +1,104 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+# 음성 조각 → 음성 인식 결과 캐시
+# 키는 조각 PCM 바이트 + STT 설정의 해시라서, 같은 녹음을 다시 처리하면(마스킹 항목만 바꾼 경우 등) STT 요청 없음
+class TranscriptCache:
+    def __init__(self, path="stt_cache.db", ttl=30 * 24 * 60 * 60):
+        self.path = path
+        self.ttl = ttl
+        self.lock = threading.Lock()
+
+        is_new = not os.path.exists(path)
+        self.conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        if is_new and os.name == "posix":
+            os.chmod(path, 0o600)  # 원문이 들어 있으므로 본인만 읽기 가능
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS transcripts ("
+            "key TEXT PRIMARY KEY, transcript TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        with self.lock:
+            self.conn.execute("DELETE FROM transcripts WHERE last_used < ?", (time.time() - self.ttl,))
+
+    @staticmethod
+    def key(pcm, config):
+        digest = hashlib.sha256(pcm)
+        digest.update(json.dumps(config, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT transcript FROM transcripts WHERE key = ? AND last_used >= ?", (key, now - self.ttl)
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE transcripts SET last_used = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def put(self, key, transcript):
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?)", (key, transcript, time.time()))
+
+class AudioJobCheckpoint:
+    # 녹음 파일별 조각 처리 상태 (audio_jobs/<해시>.json)
+    # 완료된 조각은 마스킹된 문장과 가릴 시간 구간을 저장해 두고, 다시 실행하면 STT/NER 없이 그대로 사용
+    # (조각 경계를 다시 구하기 위해 디코딩과 VAD 는 처음부터 다시 함). 실패한 조각만 다시 요청
+    def __init__(self, source, config, folder="audio_jobs"):
+        os.makedirs(folder, exist_ok=True)
+        stat = os.stat(source)
+        job_id = hashlib.sha256(
+            json.dumps([os.path.abspath(source), stat.st_size, int(stat.st_mtime), config], sort_keys=True).encode("utf-8")
+        ).hexdigest()[:16]
+        self.path = os.path.join(folder, f"{job_id}.json")
+        self.lock = threading.Lock()
+        self.state = {"source": os.path.abspath(source), "complete": False, "segments": {}}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.state = json.load(f)
+            except (OSError, ValueError):
+                pass
+
+    def summary(self):
+        # (이전 실행이 전부 성공했는지, 완료 조각 수, 실패 조각 번호 목록)
+        segments = self.state["segments"]
+        done = sum(1 for s in segments.values() if s["status"] == "done")
+        failed = sorted(int(i) for i, s in segments.items() if s["status"] == "failed")
+        return self.state.get("complete", False), done, failed
+
+    def stored(self, index, key):
+        # 같은 조각(같은 오디오 해시)이 이전에 완료됐으면 그 항목 ({"masked", "ranges", ...}), 아니면 None
+        entry = self.state["segments"].get(str(index))
+        if entry and entry["status"] == "done" and entry["key"] == key and "masked" in entry:
+            return entry
+        return None
+
+    def mark(self, index, offset_ms, key, status, error=None, masked=None, ranges=None):
+        with self.lock:
+            entry = {"offset_ms": offset_ms, "key": key, "status": status}
+            if error is not None:
+                entry["error"] = error
+            if masked is not None:
+                entry["masked"] = masked
+                entry["ranges"] = ranges or []
+            self.state["segments"][str(index)] = entry
+            self.save()
+
+    def finish(self, failed):
+        with self.lock:
+            self.state["complete"] = not failed
+            self.save()
+
+    def save(self):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
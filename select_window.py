@@ -20,7 +20,7 @@ class SelectionWindow(QWidget):
 
         text_box = QGroupBox()
         text_grid = QGridLayout()
-        text_labels = ["이름", "주민등록번호", "전화번호", "이메일", "날짜", "시간", "장소", "기관"]
+        text_labels = ["이름", "주민등록번호", "전화번호", "이메일", "날짜", "시간", "장소", "기관", "카드번호", "계좌번호", "여권번호"]
 
         for i, label in enumerate(text_labels):
             cb = QCheckBox(label)